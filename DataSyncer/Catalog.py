@@ -0,0 +1,155 @@
+# Catalog class, index of the recordings in a directory
+
+import json
+import os
+import re
+
+import numpy as np
+
+from .SyncEngine import unwrapFrames, blockCorrections
+
+_log_pattern = re.compile(r"^(?P<id>.+)-(?P<log>sync|data)\.log$")
+
+
+def sensorLogColumns(path, max_columns=64):
+    # Number of columns (framesElapsed and sensors) of a sensor log, inferred from the first rows, whose framesElapsed values are consecutive. None if it cannot be inferred
+    head = np.fromfile(path, dtype=np.float32, count=3 * max_columns)
+    for num_columns in range(2, max_columns + 1):
+        if len(head) < 3 * num_columns:
+            break
+        if head[num_columns] == head[0] + 1 and head[2 * num_columns] == head[0] + 2:
+            return num_columns
+    return None
+
+
+def catalogEntry(session, id, sync_log_path, sensor_log_path, d_clock):
+    # Catalog entry of a device, from its sync log and the size of its sensor log only
+    entry = {
+        "session": session,
+        "id": id,
+        "role": "TX" if id.startswith("TX") else "RX",
+        "sync_log_path": sync_log_path,
+        "sensor_log_path": sensor_log_path,
+        "d_clock": d_clock,
+    }
+
+    if sensor_log_path is not None:
+        entry["sensor_size"] = os.path.getsize(sensor_log_path)
+        num_columns = sensorLogColumns(sensor_log_path)
+        entry["num_sensors"] = None if num_columns is None else num_columns - 1
+        entry["num_frames"] = None if num_columns is None else entry["sensor_size"] // (num_columns * 4)
+
+    if sync_log_path is not None:
+        stat = os.stat(sync_log_path)
+        entry["sync_log_size"] = stat.st_size
+        entry["sync_log_mtime"] = stat.st_mtime
+
+        sync_frames = unwrapFrames(np.fromfile(sync_log_path, dtype=[("framesElapsed", "f4"), ("msg", "f4")])["framesElapsed"])
+        entry["num_clocks"] = len(sync_frames)
+        entry["first_frame"] = int(sync_frames[0]) if len(sync_frames) else None
+        entry["last_frame"] = int(sync_frames[-1]) if len(sync_frames) else None
+
+        corrections = blockCorrections(sync_frames, d_clock) if len(sync_frames) > 1 else np.empty(0, dtype=np.int64)
+        periods = (np.diff(sync_frames) - corrections) // d_clock
+        entry["num_blocks"] = len(corrections)
+        entry["synced_frames"] = int(periods.sum() * d_clock)
+        entry["extra_frames"] = int(corrections[corrections > 0].sum())
+        entry["missing_frames"] = int(-corrections[corrections < 0].sum())
+        entry["blocks_with_extra_frames"] = int(np.count_nonzero(corrections > 0))
+        entry["blocks_with_missing_frames"] = int(np.count_nonzero(corrections < 0))
+        entry["missed_clocks"] = int((periods - 1).sum())
+        # clock signals are sent (TX) or received (RX) exactly d_clock frames apart
+        entry["d_clock_consistent"] = bool(np.all(np.diff(sync_frames) == d_clock))
+        # the sensor log covers all clock signals
+        if entry.get("num_frames") is not None and len(sync_frames):
+            entry["sensor_covers_sync"] = entry["num_frames"] >= entry["last_frame"]
+
+    return entry
+
+
+class Catalog:
+    # Catalog, index of the sessions (directories with TXn/RXn sync and sensor logs) under a directory, built from the sync logs and the sensor log sizes only, so that sessions can be found without loading them
+
+    def __init__(self, entries=None):
+        self.__entries = list(entries or [])  # one dict per device and session
+
+    # Property getters
+    @property
+    def entries(self):
+        return self.__entries
+
+    @property
+    def sessions(self):
+        # entries by session
+        sessions = {}
+        for entry in self.entries:
+            sessions.setdefault(entry["session"], []).append(entry)
+        return sessions
+
+    @classmethod
+    def build(cls, root_dir, d_clock=689 * 8 + 8, index_path=None, verbose=True):
+        # Scan root_dir for sessions. If index_path is given, entries of the existing index whose sync log has not changed are reused and the new index is saved to index_path
+        previous = {}
+        if index_path is not None and os.path.exists(index_path):
+            previous = {(entry["session"], entry["id"]): entry for entry in cls.load(index_path).entries}
+
+        entries = []
+        for dirpath, dirnames, filenames in os.walk(root_dir):
+            dirnames.sort()
+            logs = {}
+            for fn in sorted(filenames):
+                match = _log_pattern.match(fn)
+                if match:
+                    logs.setdefault(match["id"], {})[match["log"]] = os.path.join(dirpath, fn)
+            session = os.path.relpath(dirpath, root_dir)
+
+            for id, paths in logs.items():
+                entry = previous.get((session, id))
+                if entry is None or not cls.__isUpToDate(entry, paths, d_clock):
+                    if verbose:
+                        print("Indexing {} {}...".format(session, id))
+                    entry = catalogEntry(session, id, paths.get("sync"), paths.get("data"), d_clock)
+                entries.append(entry)
+
+        catalog = cls(entries)
+        if index_path is not None:
+            catalog.save(index_path)
+        return catalog
+
+    @staticmethod
+    def __isUpToDate(entry, paths, d_clock):
+        # Whether an entry still describes the logs at paths
+        if entry["d_clock"] != d_clock or entry["sync_log_path"] != paths.get("sync") or entry["sensor_log_path"] != paths.get("data"):
+            return False
+        if "sync" in paths:
+            stat = os.stat(paths["sync"])
+            if (stat.st_size, stat.st_mtime) != (entry["sync_log_size"], entry["sync_log_mtime"]):
+                return False
+        if "data" in paths and os.path.getsize(paths["data"]) != entry["sensor_size"]:
+            return False
+        return True
+
+    def save(self, index_path):
+        with open(index_path, 'w') as f:
+            json.dump(self.entries, f, indent=1)
+
+    @classmethod
+    def load(cls, index_path):
+        with open(index_path) as f:
+            return cls(json.load(f))
+
+    def query(self, predicate=None, **fields):
+        # Entries whose fields are equal to the given values and for which predicate(entry) is True
+        return [
+            entry for entry in self.entries
+            if all(entry.get(key) == value for key, value in fields.items()) and (predicate is None or predicate(entry))
+        ]
+
+    def covering(self, start, stop):
+        # Sessions in which all synced devices cover the synced frames [start, stop) (frames after the first clock signal)
+        sessions = []
+        for session, entries in self.sessions.items():
+            synced_frames = [entry["synced_frames"] for entry in entries if "synced_frames" in entry]
+            if synced_frames and 0 <= start and stop <= min(synced_frames):
+                sessions.append(session)
+        return sessions
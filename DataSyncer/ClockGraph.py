@@ -0,0 +1,124 @@
+# ClockGraph class, aligns devices across several transmitters (clock domains)
+
+from collections import deque
+
+import numpy as np
+
+from .SyncEngine import unwrapFrames, blockCorrections, clockCorrespondence, resample, checkInterpolation, INTERPOLATION_MARGIN
+
+
+def _readSyncFrames(sync_log_path):
+    # Frames at which the clock signals logged in a sync log were received, as int64 counters (as in Data.sync_frames)
+    framesElapsed = np.fromfile(sync_log_path, dtype=[("framesElapsed", "f4"), ("msg", "f4")])["framesElapsed"]
+    return unwrapFrames(framesElapsed)
+
+
+class ClockGraph:
+    # ClockGraph, graph of the clock domains of a rig with several transmitters (TX) bridged through shared receivers (a receiver with one sync log per transmitter it receives clock signals from). Each link between a device and a transmitter is aligned once from the sync logs (the frame of the device at which each clock signal was received and the frame of the TX at which it was sent, see SyncEngine.clockCorrespondence) and cached, and the alignments along the shortest path between two devices are composed, so that any device can be projected onto the clock of any other device
+
+    def __init__(self, plan_cache=None, verbose=True):
+
+        self.__devices = {}  # Data (DataSyncerTX, DataSyncerRX) of each device, by id
+        self.__links = {}  # sync log and d_clock of each link, by (device id, TX id)
+        self.__alignments = {}  # cached alignments (device frames, TX frames) of each link, by (device id, TX id)
+        self.__plan_cache = plan_cache  # optional SyncPlanCache, shared with DataSyncerRX.syncSensorData
+        self.__verbose = verbose  # print info messages
+
+    # Property getters
+    @property
+    def devices(self):
+        return self.__devices
+
+    @property
+    def links(self):
+        return list(self.__links)
+
+    def addDevice(self, data):
+        # Add a device (a Data object with a sync log), by its id
+        self.__devices[data.id] = data
+        return self
+
+    def link(self, device_id, TX_id, sync_log_path=None, d_clock=None):
+        # Link a device to a transmitter it received clock signals from, logged in sync_log_path (the sync log of the device if None). d_clock defaults to the d_clock of the transmitter
+        sync_log_path = sync_log_path if sync_log_path is not None else self.devices[device_id].sync_log_path
+        d_clock = d_clock if d_clock is not None else self.devices[TX_id].d_clock
+        self.__links[(device_id, TX_id)] = (sync_log_path, d_clock)
+        self.__alignments.pop((device_id, TX_id), None)
+        return self
+
+    def __alignment(self, device_id, TX_id):
+        # Frames of the device at which the clock signals were received and frames of the TX at which they were sent, computed once per link
+        if (device_id, TX_id) not in self.__alignments:
+            sync_log_path, d_clock = self.__links[(device_id, TX_id)]
+            TX = self.devices[TX_id]
+            if self.__verbose:
+                print("Aligning {} to {}...".format(device_id, TX_id))
+
+            sync_frames = _readSyncFrames(sync_log_path)
+            corrections = None
+            if self.__plan_cache is not None:
+                key = self.__plan_cache.key(sync_log_path, TX.sync_log_path, d_clock)
+                corrections = self.__plan_cache.load(key, len(sync_frames) - 1)
+            if corrections is None:
+                corrections = blockCorrections(sync_frames, d_clock)
+                if self.__plan_cache is not None:
+                    self.__plan_cache.save(key, corrections)
+
+            TX_frames, device_frames = clockCorrespondence(sync_frames, corrections, d_clock)
+            self.__alignments[(device_id, TX_id)] = (sync_frames[0] + device_frames, TX.sync_frames[0] + TX_frames)
+
+        return self.__alignments[(device_id, TX_id)]
+
+    def path(self, source_id, target_id):
+        # Shortest chain of device ids linking source_id to target_id (breadth-first search over the links)
+        neighbours = {}
+        for device_id, TX_id in self.__links:
+            neighbours.setdefault(device_id, []).append(TX_id)
+            neighbours.setdefault(TX_id, []).append(device_id)
+
+        previous = {source_id: None}
+        queue = deque([source_id])
+        while queue:
+            id = queue.popleft()
+            if id == target_id:
+                path = []
+                while id is not None:
+                    path.append(id)
+                    id = previous[id]
+                return path[::-1]
+            for neighbour in neighbours.get(id, []):
+                if neighbour not in previous:
+                    previous[neighbour] = id
+                    queue.append(neighbour)
+
+        raise ValueError("{} and {} are not linked".format(source_id, target_id))
+
+    def mapFrames(self, frames, source_id, target_id):
+        # Frames of target_id corresponding to frames of source_id, composing the alignments along the path between them (linear between consecutive clock signals)
+        frames = np.asarray(frames, dtype=np.float64)
+        path = self.path(source_id, target_id)
+        for a, b in zip(path[:-1], path[1:]):
+            if (a, b) in self.__links:
+                a_frames, b_frames = self.__alignment(a, b)
+            else:
+                b_frames, a_frames = self.__alignment(b, a)
+            frames = np.interp(frames, a_frames, b_frames)
+        return frames
+
+    def project(self, device_id, reference_id, start=None, stop=None, interpolation="linear"):
+        # Sensor data of device_id resampled onto the frames [start, stop) of the clock of reference_id (by default, the frames between its first and last clock signal, the same frames as its own offset sensor data). Only the frames of the device log covering the projection are read. Projecting a receiver onto its transmitter gives the same data as DataSyncerRX.syncSensorData with drift_model="piecewise"
+        checkInterpolation(interpolation)
+        reference = self.devices[reference_id]
+        start = reference.sync_frames[0] if start is None else start
+        stop = reference.sync_frames[-1] if stop is None else stop
+
+        device = self.devices[device_id]
+        positions = self.mapFrames(np.arange(start, stop), reference_id, device_id)
+        if not len(positions):
+            return np.empty((0, device.num_sensors), dtype=np.float32)
+
+        # positions are frames of the device, i.e. rows of its sensor log, of which only those between its first and last clock signal are used (as in its offset sensor data)
+        first = max(int(np.floor(positions.min())) - INTERPOLATION_MARGIN, device.sync_frames[0])
+        last = min(int(np.ceil(positions.max())) + INTERPOLATION_MARGIN + 1, device.sync_frames[-1])
+        sensor = device._readSensorFrames(first, last)
+        return resample(sensor, np.clip(positions - first, 0, len(sensor) - 1), interpolation)
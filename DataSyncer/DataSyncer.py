@@ -1,14 +1,21 @@
 # Data, DataSyncerTX and DataSyncerRX classes
+#
+# The data is kept in numpy arrays (a float32 sensor matrix and an int64 vector of sync frames). pandas and matplotlib are only imported when a dataframe or a plot is requested
+
+import time
 
-import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
+
+from .SyncEngine import unwrapFrames, blockCorrections, syncIndexMap, syncPositions, windowIndexMap, resample, syncBlocks, fillBlocks, checkInterpolation, driftModel, driftPositions, INTERPOLATION_MARGIN, DRIFT_MODELS
+from .SyncedDataFile import writeSyncedData
+from .Plotting import plotDecimated
+from .SyncReport import SyncReport
 
 
 class Data:
     # Data class, parent class for DataSyncerTX and DataSyncerRX
 
-    def __init__(self, id, num_sensors, sensor_log_path,  sync_log_path=None, sample_rate=None, verbose=True):
+    def __init__(self, id, num_sensors, sensor_log_path,  sync_log_path=None, sample_rate=None, verbose=True, mmap=False):
 
         self.__id = id  # Bela id. TX0 for transmitter/master and RX0, RX1, ... for receivers/slaves
         # number of sensors connected to the Bela analog ports
@@ -18,6 +25,8 @@ class Data:
         self.__isMulti = False if self.sync_log_path is None else True
         self.__sample_rate = sample_rate  # analog sample rate of the Bela
         self.__verbose = verbose  # print info messages
+        self.__mmap = mmap  # memory-map the log files instead of reading them into memory
+        self.__report = SyncReport(id)  # timings and sync statistics
 
         self.__sync_datatype = None if not self.__isMulti else [("framesElapsed", "f4"),
                                                                 ("msg", "f4")]  # datatype for sync data (necessary for loading binary files)
@@ -28,23 +37,81 @@ class Data:
               for i in range(1, self.num_sensors + 1)],
         ]  # datatype for sensor data (necessary for loading binary files)
 
-        # Load TX raw data from log files
-        self.__sync_raw = None if not self.__isMulti else self.loadBinaryData(
-            self.__sync_log_path, self.__sync_datatype)
-        self.__sensor_raw = self.loadBinaryData(
-            self.__sensor_log_path, self.__sensor_raw_datatype)
+        # The log files are only loaded when their data is first accessed, so that constructing a Data object is instant
+        self.__sync_raw = None
+        self.__sync_frames = None
+        self.__sync_df_raw = None
+        self.__sensor_raw = None
+        self.__sensor = None
+        self.__sensor_columns = None
+        self.__sensor_df = None
+        self.__loaded = False  # whether the sensor data has been loaded
+        self.__sync_future = None  # prefetched sync data
+        self.__sensor_future = None  # prefetched sensor data
+
+    def __loadSyncData(self):
+        # Load raw sync data from the sync log file and the frames at which the clock signals were received as int64 counters (framesElapsed is logged as float32, which is not exact past 2^24 frames, see SyncEngine.unwrapFrames)
+        if self.__isMulti and self.__sync_raw is None:
+            if self.__sync_future is not None:
+                self.__sync_raw = self.__prefetched(self.__sync_future)
+            else:
+                self.__sync_raw = self.loadBinaryData(self.__sync_log_path, self.__sync_datatype)
+            self.__sync_frames = unwrapFrames(self.__sync_raw["framesElapsed"])
+
+    def __loadSensorData(self):
+        # Load raw sensor data from the sensor log file
+        self.__loaded = True
+        if self.__sensor_future is not None:
+            self.__sensor_raw = self.__prefetched(self.__sensor_future)
+        else:
+            self.__sensor_raw = self.loadBinaryData(
+                self.__sensor_log_path, self.__sensor_raw_datatype)
 
-        # Load the raw data into pandas dataframes for easier manipulation
-        self.__sync_df_raw = None if not self.__isMulti else pd.DataFrame(
-            self.__sync_raw).astype(int)
-        self.__sensor_df = pd.DataFrame(self.__sensor_raw)
+        # The sensor data is kept as a 2D float32 view of the raw data (no copy) and is only materialized into a dataframe when sensor_df is accessed
+        self._setSensorData(self.__sensor_raw.view(np.float32).reshape(-1, len(self.__sensor_raw_datatype)),
+                            [name for name, _ in self.__sensor_raw_datatype])
 
         if self.__isMulti:
             # Remove sensor data recorded before the first and after the last sync message
             self.__offsetSensorData()
         else:
-            self.sensor_df = self.sensor_df.drop(
-                'framesElapsed', axis=1).reset_index(drop=True)
+            self._setSensorData(self.__sensor[:, 1:], self.__sensor_columns[1:])
+
+        self._onLoad()
+
+    def _onLoad(self):
+        # Called once the sensor data has been loaded and offset, subclasses process it further here
+        pass
+
+    def _prepareSensorData(self):
+        # Called before the sensor data is accessed. Loads the sensor data on first access, subclasses apply deferred processing (e.g. syncing) here
+        if not self.__loaded:
+            self.__loadSensorData()
+
+    def load(self):
+        # Load (and process) the sensor data now instead of on first access
+        self._prepareSensorData()
+        return self
+
+    def prefetch(self, executor, sensor=True):
+        # Start reading the sync log (and the sensor log if sensor=True) in executor, e.g. a ThreadPoolExecutor, so that the reads run concurrently with other reads and processing. The data is taken from the reads when it is first accessed
+        if self.__isMulti and self.__sync_raw is None and self.__sync_future is None:
+            self.__sync_future = executor.submit(self.__timedRead, self.__sync_log_path, self.__sync_datatype)
+        if sensor and not self.__loaded and self.__sensor_future is None:
+            self.__sensor_future = executor.submit(self.__timedRead, self.__sensor_log_path, self.__sensor_raw_datatype)
+        return self
+
+    def __timedRead(self, path, dtype):
+        # Read a log file in an I/O thread. The read is timed here but its timing is only added to the report (and the profiler is not entered) by the thread that takes the data, see __prefetched
+        start = time.perf_counter()
+        data = self._readBinaryData(path, dtype)
+        return data, time.perf_counter() - start
+
+    def __prefetched(self, future):
+        # Data of a prefetched read, its timing added to the load phase
+        data, seconds = future.result()
+        self.report.addTiming("load", seconds)
+        return data
 
     # Property getters
     @property
@@ -65,24 +132,56 @@ class Data:
 
     @property
     def sensor_raw(self):
+        self._prepareSensorData()
         return self.__sensor_raw
 
     @property
     def sync_raw(self):
+        self.__loadSyncData()
         return self.__sync_raw
 
+    @property
+    def sensor_frames(self):
+        # framesElapsed of each row of the raw sensor log as int64 counters, unwrapped against the row position (the first value is exact, the float32 values are not past 2^24 frames)
+        sensor_raw = self.sensor_raw
+        first = int(sensor_raw["framesElapsed"][0]) if len(sensor_raw) else 0
+        return first + np.arange(len(sensor_raw), dtype=np.int64)
+
+    @property
+    def sync_frames(self):
+        self.__loadSyncData()
+        return self.__sync_frames
+
     @property
     def sync_df_raw(self):
+        # raw sync data in a pandas dataframe, built on first access
+        self.__loadSyncData()
+        if self.__sync_df_raw is None and self.__isMulti:
+            import pandas as pd
+            self.__sync_df_raw = pd.DataFrame(self.__sync_raw).astype(int)
+            self.__sync_df_raw["framesElapsed"] = self.__sync_frames  # the int64 frame counters, not the float32 values
         return self.__sync_df_raw
 
     @property
     def sensor_df(self):
+        self._prepareSensorData()
+        if self.__sensor_df is None:
+            import pandas as pd
+            # in mmap mode the data is only read into memory at this point
+            self.__sensor_df = pd.DataFrame(np.array(self.__sensor) if self.mmap else self.__sensor,
+                                            columns=self.__sensor_columns)
         return self.__sensor_df
 
     @property
     def sensor_np(self):
-        return self.__sensor_df.to_numpy()
-    
+        self._prepareSensorData()
+        return self.__sensor
+
+    @property
+    def sensor_columns(self):
+        self._prepareSensorData()
+        return self.__sensor_columns
+
     @property
     def sample_rate(self):
         return self.__sample_rate
@@ -91,216 +190,349 @@ class Data:
     def verbose(self):
         return self.__verbose
 
+    @property
+    def mmap(self):
+        return self.__mmap
+
+    @property
+    def report(self):
+        return self.__report
+
     # Property setters
     @sensor_df.setter  # needs a setter in order to update the sensor_df after sync
     def sensor_df(self, value):
+        self._prepareSensorData()  # deferred processing must not be applied to the new data
         self.__sensor_df = value
+        self.__sensor = value.to_numpy()
+        self.__sensor_columns = list(value.columns)
 
     @verbose.setter
     def verbose(self, value):
         self.__verbose = value
 
+    def _setSensorData(self, sensor, columns):
+        # Replace the sensor data (2D array, possibly a view of the log file) and its column names. The sensor dataframe is rebuilt on next access
+        self.__sensor = sensor
+        self.__sensor_columns = list(columns)
+        self.__sensor_df = None
+
+    def _offsetSensorRaw(self):
+        # Offset sensor data as recorded (framesElapsed and the sensor values, a 2D float32 view of the raw data) and its column names, before any further processing (e.g. syncing), so that it can be processed again
+        sensor = self.__sensor_raw.view(np.float32).reshape(-1, len(self.__sensor_raw_datatype))
+        if self.__isMulti:
+            sensor = sensor[self.sync_frames[0]:self.sync_frames[-1]]
+        return sensor, [name for name, _ in self.__sensor_raw_datatype]
+
     def __offsetSensorData(self):
-        # Remove sensor data recorded before the first and after the last sync message
-        self.__sensor_df = self.sensor_df.iloc[self.sync_df_raw["framesElapsed"].iloc[0]:self.
-                                               sync_df_raw["framesElapsed"].iloc[-1]].copy()
+        # Remove sensor data recorded before the first and after the last sync message (the sliced data is a view, no copy is made)
+        with self.report.phase("offset"):
+            num_frames = len(self.__sensor)
+            self._setSensorData(self.__sensor[self.sync_frames[0]:self.sync_frames[-1]], self.__sensor_columns)
+            self.report.offset_frames = num_frames - len(self.__sensor)
         if self.verbose:
             print("Offsetting {} sensor data...".format(self.id))
 
-    def plotSensorRaw(self):
-        # Plot each sensor raw signal over framesElapsed
+    def plotSensorRaw(self, time_range=None, num_bins=None, follow_zoom=False):
+        # Plot each sensor raw signal over framesElapsed. Long recordings are decimated to the minimum and maximum of each of num_bins bins (by default the width of the plot in pixels). time_range (in seconds if sample_rate is set, frames otherwise) plots only part of the data and with follow_zoom=True the data is decimated again when zooming in
+        import matplotlib.pyplot as plt
         _, ax = plt.subplots()
 
-        # framesElapsed is the first item of each row
-        framesElapsed = [e[0] for e in self.sensor_raw]
-        
+        # framesElapsed is the first item of each row, as int64 counters so that long recordings are plotted at the right frames
+        sensor_raw = self.sensor_raw.view(np.float32).reshape(-1, self.num_sensors + 1)
+        framesElapsed = self.sensor_frames
+
         if self.sample_rate:
-            timeElapsed = [e / self.sample_rate for e in framesElapsed] # time elapsed
-            x = timeElapsed
+            scale = 1 / self.sample_rate  # time elapsed
             x_label = "Time Elapsed (s)"
         else:
-            x = framesElapsed 
+            scale = 1
             x_label = "Frames Elapsed"
 
-
-        for j in range(1, self.num_sensors + 1):
-            ax.plot(x, [
-                    e[j] for e in self.sensor_raw], label="{}-x{}".format(self.id, str(j)))
+        plotDecimated(ax, sensor_raw[:, 1:], ["{}-x{}".format(self.id, str(j)) for j in range(1, self.num_sensors + 1)],
+                      x=framesElapsed, scale=scale, x_range=time_range, num_bins=num_bins, follow_zoom=follow_zoom)
 
         ax.set_title("Raw {} Sensor Data".format(self.id))
         ax.set_xlabel(x_label)
 
         ax.legend(loc="upper left")
-        
+
         return ax
 
-    def plotSensor(self):
-        
-        # Plot each sensor raw signal over framesElapsed
+    def plotSensor(self, time_range=None, num_bins=None, follow_zoom=False):
+        # Plot each synced sensor signal over frames (the row index). Decimation, time_range and follow_zoom as in plotSensorRaw
+        import matplotlib.pyplot as plt
         _, ax = plt.subplots()
 
-        # framesElapsed is now the index of each row
-        framesElapsed = np.arange(self.sensor_df.shape[0])
-
         if self.sample_rate:
-            timeElapsed = [e / self.sample_rate for e in framesElapsed] 
-            x = timeElapsed
+            scale = 1 / self.sample_rate  # time elapsed
             x_label = "Time Elapsed (s)"
         else:
-            x = framesElapsed 
+            scale = 1
             x_label = "Frames Elapsed"
 
-        ax.plot(x, self.sensor_df, label=self.sensor_df.columns)
+        plotDecimated(ax, self.sensor_np, self.sensor_columns, scale=scale, x_range=time_range, num_bins=num_bins,
+                      follow_zoom=follow_zoom)
 
         ax.set_title("Synced {} Sensor Data".format(self.id))
         ax.set_xlabel(x_label)
 
         ax.legend(loc="upper left")
-        
+
         return ax
 
     def loadBinaryData(self, path, dtype):
         # Load binary data from log file, given data type
-        if self.verbose:
-            print('Loading "{}"...'.format(path))
-
-        _ = np.fromfile(path, dtype=dtype)
+        with self.report.phase("load"):
+            _ = self._readBinaryData(path, dtype)
 
         return _
 
-    def saveSyncedData(self, filepath):
-        # Save synced sensor data to binary file
-        f = open(filepath, 'w+b')
-        binary_format = bytearray(self.sensor_np)
-        f.write(binary_format)
-        f.close()
+    def _readBinaryData(self, path, dtype):
+        # Read (or memory-map) a log file, given data type
+        if self.verbose:
+            print('Loading "{}"...'.format(path))
+
+        if self.mmap:
+            return np.memmap(path, dtype=dtype, mode='r')
+        return np.fromfile(path, dtype=dtype)
+
+    def _readSensorFrames(self, start, stop):
+        # Read the sensor values (without framesElapsed) of the frames [start, stop) from the sensor log, without loading the rest of it
+        num_columns = self.num_sensors + 1  # framesElapsed and sensor values
+        row_size = num_columns * np.dtype(np.float32).itemsize
+        count = max(stop - start, 0)
+        return np.fromfile(self.sensor_log_path, dtype=np.float32, count=count * num_columns,
+                           offset=start * row_size).reshape(-1, num_columns)[:, 1:]
+
+    def _windowFrames(self, start, stop, seconds):
+        # Window in frames, converted from seconds with sample_rate if seconds=True
+        if not seconds:
+            return int(start), int(stop)
+        if not self.sample_rate:
+            raise ValueError("{} has no sample_rate, the window can only be given in frames".format(self.id))
+        return int(round(start * self.sample_rate)), int(round(stop * self.sample_rate))
+
+    def _metadata(self):
+        # Metadata stored in the header of the files saved with saveSyncedData (besides the column names)
+        return {"id": self.id, "sample_rate": self.sample_rate, "synced_to_id": None, "d_clock": None}
+
+    def saveSyncedData(self, filepath, blocks=None, metadata=None, chunk_frames=None, raw=False):
+        # Save synced sensor data to a chunked binary file with a header (see SyncedDataFile), readable with SyncedDataLoader. If blocks (an iterable of 2D arrays, e.g. DataSyncerRX.syncSensorDataStream) is given, the blocks are written one after the other instead of sensor_np. metadata updates the header fields and chunk_frames (number of frames per chunk) defaults to d_clock. With raw=True, headerless float32 data is written instead
+        if blocks is None:
+            blocks = [self.sensor_np]  # loaded (and synced) before timing the save
+            columns = self.sensor_columns
+        else:  # synced blocks do not have a framesElapsed column, and the sensor data does not need to be loaded
+            columns = [name for name, _ in self.__sensor_raw_datatype[1:]]
+
+        with self.report.phase("save"):
+            header = {**self._metadata(), "columns": columns, **(metadata or {})}
+
+            if raw:
+                f = open(filepath, 'w+b')
+                for block in blocks:
+                    np.ascontiguousarray(block, dtype=np.float32).tofile(f)
+                f.close()
+                return
+
+            if chunk_frames is None:
+                chunk_frames = header["d_clock"] or 8192
+
+            writeSyncedData(filepath, blocks, header, chunk_frames)
 
 
 class DataSyncerTX(Data):
     # DataSyncerTX, class for transmitter/master Bela
 
-    def __init__(self, id, sync_log_path, sensor_log_path, num_sensors, d_clock=689 * 8 + 8, sample_rate=None, verbose=True):
+    def __init__(self, id, sync_log_path, sensor_log_path, num_sensors, d_clock=689 * 8 + 8, sample_rate=None, verbose=True, mmap=False):
 
         super(DataSyncerTX, self).__init__(
-            id=id, sync_log_path=sync_log_path, sensor_log_path=sensor_log_path, num_sensors=num_sensors, sample_rate=sample_rate,verbose=verbose)
+            id=id, sync_log_path=sync_log_path, sensor_log_path=sensor_log_path, num_sensors=num_sensors, sample_rate=sample_rate,verbose=verbose, mmap=mmap)
 
         self.__d_clock = d_clock  # interval in frames at which the TX sends a clock signal
 
-        # framesElapsed is dropped from the processed sensor data since after interpolation/dropping in the RX signals there appear decimal or missing framesElapsed values, so the raw/recorded framesElapsed value is dropped and the row index is used instead
-        self.sensor_df = self.sensor_df.drop(
-            'framesElapsed', axis=1).reset_index(drop=True)
-
     # Property getters
     @property
     def d_clock(self):
         return self.__d_clock
 
+    def _onLoad(self):
+        # framesElapsed is dropped from the processed sensor data since after interpolation/dropping in the RX signals there appear decimal or missing framesElapsed values, so the raw/recorded framesElapsed value is dropped and the row index is used instead
+        self._setSensorData(self.sensor_np[:, 1:], self.sensor_columns[1:])
+
+    def _metadata(self):
+        return {**super(DataSyncerTX, self)._metadata(), "d_clock": self.d_clock}
+
+    def sensorDataWindow(self, start, stop, seconds=False):
+        # Sensor data in the window [start, stop) of frames after the first clock signal (or seconds if seconds=True, using sample_rate), read from the sensor log without loading the rest of it
+        start, stop = self._windowFrames(start, stop, seconds)
+        num_frames = self.sync_frames[-1] - self.sync_frames[0]
+        start = max(start, 0)
+        stop = max(min(stop, num_frames), start)
+        return self._readSensorFrames(self.sync_frames[0] + start, self.sync_frames[0] + stop)
+
+    def syncedWindow(self, RX_Syncers, start, stop, seconds=False, interpolation="linear", drift_model=None):
+        # Sensor data of the transmitter and synced sensor data of each receiver (RX_Syncers) in the window [start, stop), by id. See DataSyncerRX.syncSensorDataWindow
+        if seconds:
+            start, stop = self._windowFrames(start, stop, seconds)
+        window = {self.id: self.sensorDataWindow(start, stop)}
+        for RX_Syncer in RX_Syncers:
+            window[RX_Syncer.id] = RX_Syncer.syncSensorDataWindow(self, start, stop, interpolation=interpolation, drift_model=drift_model)
+        return window
+
 
 class DataSyncerRX(Data):
     # DataSyncerRX, class for receiver/slave Bela
 
-    def __init__(self, id, sync_log_path, sensor_log_path, num_sensors, sample_rate=None, verbose=True):
+    def __init__(self, id, sync_log_path, sensor_log_path, num_sensors, sample_rate=None, verbose=True, mmap=False):
 
         super(DataSyncerRX, self).__init__(
-            id=id, sync_log_path=sync_log_path, sensor_log_path=sensor_log_path, num_sensors=num_sensors, sample_rate=sample_rate,verbose=verbose)
+            id=id, sync_log_path=sync_log_path, sensor_log_path=sensor_log_path, num_sensors=num_sensors, sample_rate=sample_rate,verbose=verbose, mmap=mmap)
 
         # whether the receiver has been synced to a transmitter, False or takes string value of transmitter id
         self.__synced_to_id = False
+        self.__d_clock = None  # d_clock of the transmitter the receiver has been synced to
+        self.__pending_sync = None  # sync deferred until the sensor data is accessed
 
     # Property getters
     @property
     def synced_to_id(self):
         return self.__synced_to_id
 
+    @property
+    def d_clock(self):
+        return self.__d_clock
+
     # Property setters
     @synced_to_id.setter  # needs a setter in order to update the synced_to_id after sync
     def synced_to_id(self, value):
         self.__synced_to_id = value
 
-    def syncSensorData(self, TX_Syncer):
+    def syncSensorData(self, TX_Syncer, plan_cache=None, interpolation="linear", drift_model=None):
         # Syncs sensor data to a transmitter's (TX_Syncer) clock signal. This means (1) the frames index in the RX and in the TX are equivalent, so (2) between each clock signal, a constant number of frames (d_clock) have elapsed, and hence (3) if there are frames missing in the RX between two clock signals, the signal values are interpolated or (4) if there are extra frames in the RX between two clock signals, those extra frames are dropped.
+        # interpolation is the mode used to fill in the missing frames ("linear", "cubic", windowed "sinc" or "hold", see SyncEngine.resample)
+        # With drift_model ("piecewise" or "robust", see SyncEngine.driftModel), the sensor data is instead resampled onto the TX frames using a model of the clock drift fitted to all clock signals, so that no frames are dropped or repeated at the end of the blocks
+        # The sync is deferred until the sensor data is accessed, only the clock data of the transmitter is kept
 
-        if self.verbose:
-            print("Syncing {} sensor data against {}...".format(
-                self.id, TX_Syncer.id))
-
-        # To keep the reference frames index, we do the interpolation/dropping on sensor_df_aux and then copy the values back to sensor_df
-        sensor_df_aux = self.sensor_df.copy()
-
-        # Iterate over each block of frames between clock signals
-        for i in range(len(self.sync_df_raw) - 1):  # i refers to the raw data
-
-            # Number of frames elapsed between two clock signals
-            diff = (self.sync_df_raw['framesElapsed'][i + 1] -
-                    self.sync_df_raw['framesElapsed'][i]) - TX_Syncer.d_clock
-
-            # If diff==0, the number of frames elapsed between two clock signals is equal to the TX's d_clock, so no interpolation/dropping is needed
-            if diff == 0:
-                continue
-
-            # If diff>0, there are extra frames in the RX between two clock signals, so we need to drop those extra frames
-            if diff > 0:
-
-                # Check if the number of frames of extra frames is larger than d_clock. If this is the case, the RX might have missed a clock signal, but as long as the next clock signal is received in a multiple of d_clock frames, there's no need for interpolation/dropping.
-                if diff > TX_Syncer.d_clock:
-                    # 'Unwrap' the difference to the nearest multiple of d_clock
-                    m = np.floor(diff / TX_Syncer.d_clock)
-                    diff = diff - m * TX_Syncer.d_clock
-                    if diff == 0:  # If the unwrapped difference is equal to 0, the number of frames elapsed is a multiple of d_clock and no interpolation/dropping is needed. Otherwise, continue to drop the extra frames
-                        continue
-
-                # TODO case in which extraframes are more than half of d_clock --> throw error
+        self.__checkModes(interpolation, drift_model)
+        self.__pending_sync = (TX_Syncer.id, TX_Syncer.d_clock, TX_Syncer.sync_log_path, plan_cache, interpolation, drift_model)
 
-                # Drop extra frames
-                for j in reversed(range(diff)):
-                    sensor_df_aux = sensor_df_aux.drop(index=(sensor_df_aux.loc[
-                        self.sensor_df['framesElapsed'] == self.sync_df_raw['framesElapsed'][i + 1]].index - j)[0])
-
-                if self.verbose:
-                    print("Dropped {} extra samples from {} sensor data".format(
-                        diff, self.id))
-
-            # If diff<0, there are frames missing in the RX between two clock signals, so we need to interpolate those missing frames
-            if diff < 0:
-
-                # TODO if more than half of the block is missing, throw error
-
-                # Linear interpolation
-                # end of current block +1
-                t2 = self.sync_df_raw['framesElapsed'][i + 1] + 1
-                # end of current block
-                t1 = self.sync_df_raw['framesElapsed'][i + 1]
-                x2 = sensor_df_aux.loc[t2, [
-                    sensor_datatype[0] for sensor_datatype in self._Data__sensor_raw_datatype[1:self.num_sensors + 1]
-                ]].values  # get sensor values at t2
-                x1 = sensor_df_aux.loc[t2, [
-                    sensor_datatype[0] for sensor_datatype in self._Data__sensor_raw_datatype[1:self.num_sensors + 1]
-                ]].values  # get sensor values at t1
-
-                m = (x2 - x1) / (t2 - t1)  # slope of linear interpolation
-
-                # Copy the values of the dataframe up until t1 (before the interpolated values)
-                sensor_df_aux_top = sensor_df_aux.loc[:t1 + 1].copy()
-
-                # Add interpolated values to the end of sensor_df_aux_top
-                for i in range(1, abs(diff) + 1):
-                    t = np.round(
-                        t1 + i * (t2 - t1) / (abs(diff) + 1), 7
-                    )  # those t (or frameElapsed in the dataframe) values are now decimal and hence do not correspond to the frameElapsed index anymore
-                    x = np.round(m * (t - t1) + x1, 7)
-                    sensor_df_aux_top.loc[t1 + i] = [t, *x]
+        # Value of synced_to_id is updated with the transmitter (TX_Syncer) id
+        self.synced_to_id = TX_Syncer.id
+        self.__d_clock = TX_Syncer.d_clock
+
+    def _prepareSensorData(self):
+        super(DataSyncerRX, self)._prepareSensorData()
+        if self.__pending_sync is not None:
+            pending_sync, self.__pending_sync = self.__pending_sync, None
+            self.__sync(*pending_sync)
+
+    @staticmethod
+    def __checkModes(interpolation, drift_model):
+        checkInterpolation(interpolation)
+        if drift_model is not None and drift_model not in DRIFT_MODELS:
+            raise ValueError("drift_model must be None or one of {}, not {!r}".format(DRIFT_MODELS, drift_model))
+
+    def __sync(self, TX_id, d_clock, TX_sync_log_path, plan_cache, interpolation, drift_model):
+
+        with self.report.phase("sync"):
+            if self.verbose:
+                print("Syncing {} sensor data against {}...".format(
+                    self.id, TX_id))
+
+            sync_frames = self.sync_frames
+
+            # Number of frames to drop (>0) or interpolate (<0) in each block between clock signals, computed for all blocks at once (or loaded from plan_cache, a SyncPlanCache, if it was computed before for the same sync logs)
+            corrections = None
+            if plan_cache is not None:
+                key = plan_cache.key(self.sync_log_path, TX_sync_log_path, d_clock)
+                corrections = plan_cache.load(key, len(sync_frames) - 1)
+                if self.verbose and corrections is not None:
+                    print("Loaded {} sync plan from cache".format(self.id))
+            if corrections is None:
+                corrections = blockCorrections(sync_frames, d_clock)
+                if plan_cache is not None:
+                    plan_cache.save(key, corrections)
+
+            if self.verbose and drift_model is None:  # the drift model resamples the data instead of dropping or adding samples
+                for diff in corrections[corrections != 0]:
+                    if diff > 0:
+                        print("Dropped {} extra samples from {} sensor data".format(
+                            diff, self.id))
+                    else:
+                        print("Added {} extra samples to {} sensor data".format(
+                            abs(diff), self.id))
+
+            # Build the synced data with a single gather over the offset sensor data followed by a single pass that interpolates all missing frames (in mmap mode, only the gathered frames are read into memory). framesElapsed is dropped from the processed sensor data since after interpolation/dropping in the RX signals there appear decimal or missing framesElapsed values, so the raw/recorded framesElapsed value is dropped and the row index is used instead. The sync always starts from the offset raw data, so that syncing again (e.g. with another interpolation) does not apply the corrections twice
+            if drift_model is None:
+                positions = syncPositions(syncIndexMap(sync_frames, corrections))
+            else:
+                positions = driftPositions(sync_frames, corrections, d_clock, drift_model)
+            sensor, columns = self._offsetSensorRaw()
+            self._setSensorData(resample(sensor[:, 1:], positions, interpolation), columns[1:])
+
+            self.report.synced_to_id = TX_id
+            self.report.setBlocks(sync_frames, corrections, d_clock, drift_model)
+
+    def _metadata(self):
+        return {**super(DataSyncerRX, self)._metadata(), "synced_to_id": self.synced_to_id or None, "d_clock": self.d_clock}
+
+    def __resampleFrames(self, positions, interpolation):
+        # Synced frames at positions (increasing) of the offset sensor data, reading only the frames they are gathered or interpolated from
+        num_rows = self.sync_frames[-1] - self.sync_frames[0]
+        first = max(int(np.floor(positions[0])) - INTERPOLATION_MARGIN, 0)
+        last = min(int(np.ceil(positions[-1])) + INTERPOLATION_MARGIN + 1, num_rows)
+        sensor = self._readSensorFrames(self.sync_frames[0] + first, self.sync_frames[0] + last)
+        return resample(sensor, positions - first, interpolation)
+
+    def syncSensorDataWindow(self, TX_Syncer, start, stop, seconds=False, interpolation="linear", drift_model=None):
+        # Synced sensor data in the window [start, stop) of frames after the first clock signal, i.e. rows of the synced sensor data (or seconds if seconds=True, using sample_rate). Only the clock blocks covering the window are read from the sensor log and synced, so it is the same as syncing the whole sensor data and slicing it, without loading it
+        start, stop = (TX_Syncer if seconds and not self.sample_rate else self)._windowFrames(start, stop, seconds)
+
+        sync_frames = self.sync_frames
+        corrections = blockCorrections(sync_frames, TX_Syncer.d_clock)
+        self.__checkModes(interpolation, drift_model)
+        if drift_model is None:
+            positions = windowIndexMap(sync_frames, corrections, start, stop, positions=True)
+        else:
+            positions = driftPositions(sync_frames, corrections, TX_Syncer.d_clock, drift_model, start, stop)
+        if not len(positions):
+            return np.empty((0, self.num_sensors), dtype=np.float32)
 
-                # Merges sensor_df_aux_top (sensor values up until t2, the end of the interpolation) with the rest of the dataframe (sensor data values after t2)
-                sensor_df_aux = pd.concat([sensor_df_aux_top,
-                                           sensor_df_aux.loc[t2:]])  # concatenate sensor_df_aux_top and sensor_df_aux
+        # read the frames of the covering blocks only, and the frames around them the missing frames are interpolated from
+        return self.__resampleFrames(positions, interpolation)
 
-                if self.verbose:
-                    print("Added {} extra samples to {} sensor data".format(
-                        abs(diff), self.id))
+    def syncSensorDataStream(self, TX_Syncer, interpolation="linear", drift_model=None):
+        # Generator version of syncSensorData for sensor logs larger than memory. The sensor log is read one block (between consecutive clock signals) at a time and the synced data is yielded in blocks of d_clock frames. sensor_df is not modified, so pass metadata={"synced_to_id": TX_Syncer.id, "d_clock": TX_Syncer.d_clock} when saving the blocks with saveSyncedData. The sensor data of the DataSyncerRX itself is never loaded
 
-        # framesElapsed is dropped from the processed sensor data since after interpolation/dropping in the RX signals there appear decimal or missing framesElapsed values, so the raw/recorded framesElapsed value is dropped and the row index is used instead
-        self.sensor_df = sensor_df_aux.drop(
-            'framesElapsed', axis=1).reset_index(drop=True)
+        if self.verbose:
+            print("Streaming {} sensor data synced against {}...".format(
+                self.id, TX_Syncer.id))
 
-        # Value of synced_to_id is updated with the transmitter (TX_Syncer) id
-        self.synced_to_id = TX_Syncer.id
+        self.__checkModes(interpolation, drift_model)
+        d_clock = TX_Syncer.d_clock
+        sync_frames = self.sync_frames
+        corrections = blockCorrections(sync_frames, d_clock)
+
+        self.report.synced_to_id = TX_Syncer.id
+        self.report.setBlocks(sync_frames, corrections, d_clock, drift_model)
+
+        if drift_model is not None:
+            # resample each block of d_clock synced frames from the frames the drift model maps it to
+            model = driftModel(sync_frames, corrections, d_clock, drift_model)
+            num_synced = int(sync_frames[-1] - sync_frames[0] - corrections.sum())
+            for start in range(0, num_synced, d_clock):
+                yield self.__resampleFrames(model(np.arange(start, start + d_clock, dtype=np.float64)), interpolation)
+            return
+
+        # read the raw frames of one block at a time (see SyncEngine.syncBlocks), framesElapsed dropped
+        num_rows = int(sync_frames[-1] - sync_frames[0])
+        blocks = syncBlocks(lambda first, last: self._readSensorFrames(sync_frames[0] + first, sync_frames[0] + last),
+                            sync_frames, corrections, 0, num_rows, num_rows, interpolation)
+
+        # synced frames which do not fill a d_clock block yet
+        pending = np.empty((0, self.num_sensors), dtype=np.float32)
+
+        for block in blocks:
+            synced, pending = fillBlocks(pending, block, d_clock)
+            for start in range(0, len(synced), d_clock):
+                yield synced[start:start + d_clock]
@@ -0,0 +1,127 @@
+# LiveSyncer class, syncs sensor data incrementally while the log files are being written
+
+import os
+import time
+
+import numpy as np
+
+from .SyncEngine import unwrapFrames, blockCorrections, syncBlocks, fillBlocks, checkInterpolation
+
+
+class LiveSyncer:
+    # LiveSyncer, syncs the sensor data of a Bela while its sync and sensor logs are still growing (e.g. during a performance recorded with bela-data-logger). Each call to update reads the clock signals received since the previous call and syncs only the newly completed blocks, so earlier data is never reprocessed and the synced data lags at most one block (d_clock frames) behind the logs. The synced data is the same as DataSyncerRX.syncSensorData (with the same interpolation mode), and a transmitter (TX) can be followed the same way
+
+    def __init__(self, id, sync_log_path, sensor_log_path, num_sensors, d_clock=689 * 8 + 8, verbose=True, interpolation="linear"):
+
+        self.__id = id  # Bela id
+        self.__sync_log_path = sync_log_path  # path to sync log file
+        self.__sensor_log_path = sensor_log_path  # path to sensor log file
+        self.__num_sensors = num_sensors  # number of sensors connected to the Bela analog ports
+        self.__d_clock = d_clock  # interval in frames at which the TX sends a clock signal
+        self.__verbose = verbose  # print info messages
+        checkInterpolation(interpolation)
+        self.__interpolation = interpolation  # interpolation mode of the missing frames, see DataSyncerRX.syncSensorData
+
+        self.__sync_values = np.empty(0, dtype=np.float32)  # framesElapsed values of the clock signals read so far, as logged
+        self.__sync_frames = np.empty(0, dtype=np.int64)  # frames at which the clock signals were received
+        self.__corrections = np.empty(0, dtype=np.int64)  # frames to drop (>0) or interpolate (<0) in each block
+        self.__num_synced_blocks = 0  # number of blocks synced so far
+        # synced frames which do not fill a d_clock block yet
+        self.__pending = np.empty((0, num_sensors), dtype=np.float32)
+        self.__synced = []  # synced data, one array per update
+        self.__sensor_np = None  # cached concatenation of the synced data
+
+    # Property getters
+    @property
+    def id(self):
+        return self.__id
+
+    @property
+    def d_clock(self):
+        return self.__d_clock
+
+    @property
+    def sync_frames(self):
+        return self.__sync_frames
+
+    @property
+    def num_synced_blocks(self):
+        return self.__num_synced_blocks
+
+    @property
+    def verbose(self):
+        return self.__verbose
+
+    @property
+    def sensor_np(self):
+        if self.__sensor_np is None:
+            self.__sensor_np = np.concatenate([np.empty((0, self.__num_sensors), dtype=np.float32), *self.__synced])
+        return self.__sensor_np
+
+    def __readSyncLog(self):
+        # Read the clock signals appended to the sync log since the last read
+        record_size = 2 * np.dtype(np.float32).itemsize  # framesElapsed and msg
+        num_records = os.path.getsize(self.__sync_log_path) // record_size
+        if num_records <= len(self.__sync_frames):
+            return
+
+        new_values = np.fromfile(self.__sync_log_path, dtype=np.float32, count=(num_records - len(self.__sync_frames)) * 2,
+                                 offset=len(self.__sync_frames) * record_size)[::2]
+        # the frame counters are unwrapped from all the values, as when the whole log is read, and the counters of the clock signals read before are kept
+        self.__sync_values = np.concatenate([self.__sync_values, new_values])
+        new_frames = unwrapFrames(self.__sync_values)[len(self.__sync_frames):]
+
+        # corrections of the blocks ended by the new clock signals
+        if len(self.__sync_frames):
+            self.__corrections = np.concatenate(
+                [self.__corrections, blockCorrections(np.concatenate([self.__sync_frames[-1:], new_frames]), self.d_clock)])
+        else:
+            self.__corrections = blockCorrections(new_frames, self.d_clock)
+        self.__sync_frames = np.concatenate([self.__sync_frames, new_frames])
+
+    def update(self):
+        # Sync the blocks completed since the last update. Returns the newly synced frames (a multiple of d_clock, possibly none)
+        self.__readSyncLog()
+
+        num_columns = self.__num_sensors + 1  # framesElapsed and sensor values
+        row_size = num_columns * np.dtype(np.float32).itemsize
+        num_frames = os.path.getsize(self.__sensor_log_path) // row_size  # frames written to the sensor log so far
+
+        sync_frames = self.__sync_frames
+
+        def readRows(first, last):
+            # rows [first, last) of the offset sensor data, framesElapsed dropped
+            return np.fromfile(self.__sensor_log_path, dtype=np.float32, count=(last - first) * num_columns,
+                               offset=(sync_frames[0] + first) * row_size).reshape(-1, num_columns)[:, 1:]
+
+        # a block is complete once the next clock signal is received and its frames are written, and the last block is never known while the logs grow (see SyncEngine.syncBlocks)
+        new_frames = []
+        if len(sync_frames):
+            num_rows = np.iinfo(np.int64).max
+            for block in syncBlocks(readRows, sync_frames, self.__corrections, self.__num_synced_blocks, num_rows,
+                                    num_frames - sync_frames[0], self.__interpolation):
+                new_frames.append(block)
+                self.__num_synced_blocks += 1
+
+        synced, self.__pending = fillBlocks(self.__pending, np.concatenate(new_frames) if new_frames else self.__pending[:0], self.d_clock)
+
+        if len(synced):
+            self.__synced.append(synced)
+            self.__sensor_np = None
+            if self.verbose:
+                print("Synced {} new frames of {} sensor data".format(len(synced), self.id))
+
+        return synced
+
+    def follow(self, poll_interval=0.1, timeout=None):
+        # Generator that polls the logs every poll_interval seconds and yields the newly synced frames. Stops when no new frames have been synced for timeout seconds (never if timeout is None)
+        last_update = time.monotonic()
+        while True:
+            synced = self.update()
+            if len(synced):
+                last_update = time.monotonic()
+                yield synced
+            elif timeout is not None and time.monotonic() - last_update > timeout:
+                return
+            else:
+                time.sleep(poll_interval)
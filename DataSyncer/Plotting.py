@@ -0,0 +1,58 @@
+# Min/max decimation for plotting long recordings
+
+import numpy as np
+
+
+def minMaxIndices(y, start, stop, num_bins):
+    # Indices (sorted, within [start, stop)) of the minimum and maximum of y (1D) in each of num_bins bins, so that the decimated signal keeps the envelope of the original one. If there are fewer than 2 * num_bins frames, all indices are returned
+    num_frames = stop - start
+    if num_frames <= 2 * num_bins:
+        return np.arange(start, stop)
+
+    bin_size = int(np.ceil(num_frames / num_bins))
+    num_full = num_frames // bin_size * bin_size
+
+    bins = np.asarray(y[start:start + num_full]).reshape(-1, bin_size)
+    offsets = start + np.arange(len(bins)) * bin_size
+    idx = [offsets + bins.argmin(axis=1), offsets + bins.argmax(axis=1)]
+
+    if num_full < num_frames:  # last (shorter) bin
+        rest = np.asarray(y[start + num_full:stop])
+        idx.append(start + num_full + np.array([rest.argmin(), rest.argmax()]))
+
+    return np.unique(np.concatenate(idx))
+
+
+def plotDecimated(ax, y, labels, x=None, scale=1, x_range=None, num_bins=None, follow_zoom=False):
+    # Plot each column of y (2D, frames x sensors) over x (frames, the row index if None) times scale, with at most two points per bin. num_bins defaults to the width of ax in pixels, x_range (in x units) plots only part of the data and with follow_zoom=True the data is decimated again whenever the x limits of ax change (e.g. when zooming in)
+    num_frames = len(y)
+    if num_bins is None:
+        num_bins = max(int(ax.get_window_extent().width), 1)
+
+    def frameRange(x_min, x_max):
+        # [start, stop) frames within the x limits
+        if x is None:
+            start, stop = int(np.floor(x_min / scale)), int(np.ceil(x_max / scale)) + 1
+        else:
+            start, stop = np.searchsorted(x, x_min / scale), np.searchsorted(x, x_max / scale, side='right')
+        return max(start, 0), min(stop, num_frames)
+
+    def lineData(column, start, stop):
+        idx = minMaxIndices(y[:, column], start, stop, num_bins)
+        return (idx if x is None else np.asarray(x)[idx]) * scale, y[idx, column]
+
+    start, stop = (0, num_frames) if x_range is None else frameRange(*x_range)
+    lines = [ax.plot(*lineData(column, start, stop), label=label)[0] for column, label in enumerate(labels)]
+
+    if x_range is not None:
+        ax.set_xlim(*x_range)
+
+    if follow_zoom:
+        def onXlimChanged(ax):
+            start, stop = frameRange(*ax.get_xlim())
+            for column, line in enumerate(lines):
+                line.set_data(*lineData(column, start, stop))
+
+        ax.callbacks.connect('xlim_changed', onXlimChanged)
+
+    return lines
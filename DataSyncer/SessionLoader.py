@@ -0,0 +1,61 @@
+# SessionLoader class, reads the logs of a session concurrently and syncs each receiver as soon as its logs are read
+
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+
+class SessionLoader:
+    # SessionLoader, loads a transmitter (TX) and its receivers (RX) with all log reads issued at once to a pool of max_io threads (e.g. for logs on network-mounted storage), and syncs each receiver in a pool of num_workers threads as soon as its logs and the clock data of the transmitter have been read, so that reading the remaining logs overlaps with syncing. The logs are read in the order of RX_Syncers, so the first receiver is synced first
+
+    def __init__(self, TX_Syncer, RX_Syncers, max_io=8, num_workers=None, plan_cache=None, interpolation="linear", drift_model=None, verbose=True):
+
+        self.__TX_Syncer = TX_Syncer  # DataSyncerTX of the session
+        self.__RX_Syncers = list(RX_Syncers)  # DataSyncerRX of each receiver
+        self.__max_io = max_io  # maximum number of concurrent log reads
+        self.__num_workers = num_workers  # number of sync threads, defaults to the ThreadPoolExecutor default
+        self.__plan_cache = plan_cache  # optional SyncPlanCache
+        self.__interpolation = interpolation  # interpolation mode of the missing frames, see DataSyncerRX.syncSensorData
+        self.__drift_model = drift_model  # clock-drift model, see DataSyncerRX.syncSensorData
+        self.__verbose = verbose  # print info messages
+
+    # Property getters
+    @property
+    def TX_Syncer(self):
+        return self.__TX_Syncer
+
+    @property
+    def RX_Syncers(self):
+        return self.__RX_Syncers
+
+    def __syncReceiver(self, RX_Syncer):
+        # Sync a receiver once its logs have been read (the TX clock data is read by syncSensorData)
+        RX_Syncer.syncSensorData(self.TX_Syncer, plan_cache=self.__plan_cache,
+                                 interpolation=self.__interpolation, drift_model=self.__drift_model)
+        return RX_Syncer.load()
+
+    def loadAsCompleted(self):
+        # Generator that yields each DataSyncerRX once it has been synced, in the order they are completed. The TX sensor data is read as well and is ready once the generator is exhausted
+
+        if self.__verbose:
+            print("Loading {} and {} receivers...".format(self.TX_Syncer.id, len(self.RX_Syncers)))
+
+        with ThreadPoolExecutor(max_workers=self.__max_io) as io, ThreadPoolExecutor(max_workers=self.__num_workers) as workers:
+            # the TX clock data is needed by every receiver, so it is read first and its sensor data last
+            self.TX_Syncer.prefetch(io, sensor=False)
+            for RX_Syncer in self.RX_Syncers:
+                RX_Syncer.prefetch(io)
+            self.TX_Syncer.prefetch(io)
+
+            synced = [workers.submit(self.__syncReceiver, RX_Syncer) for RX_Syncer in self.RX_Syncers]
+            for future in as_completed(synced):
+                RX_Syncer = future.result()
+                if self.__verbose:
+                    print("Synced {} against {}".format(RX_Syncer.id, self.TX_Syncer.id))
+                yield RX_Syncer
+
+            self.TX_Syncer.load()
+
+    def load(self):
+        # Load and sync all receivers. Returns the DataSyncerRX of each receiver, in the order of RX_Syncers
+        for _ in self.loadAsCompleted():
+            pass
+        return self.RX_Syncers
@@ -0,0 +1,104 @@
+# SessionSyncer class, syncs several receivers against one transmitter in parallel
+
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from .DataSyncer import DataSyncerRX
+
+
+class TXClock:
+    # Clock data of a transmitter, all DataSyncerRX.syncSensorData needs from a DataSyncerTX. It is sent once to each worker process instead of pickling the whole DataSyncerTX
+
+    def __init__(self, id, d_clock, sync_log_path=None):
+        self.id = id
+        self.d_clock = d_clock
+        self.sync_log_path = sync_log_path
+
+
+_tx_clock = None  # clock data of the transmitter in a worker process
+_plan_cache = None  # SyncPlanCache shared by the worker processes
+_interpolation = "linear"  # interpolation mode of the missing frames
+_drift_model = None  # clock-drift model, None to drop/insert frames at the end of the blocks
+
+
+def _initWorker(tx_clock, plan_cache, interpolation="linear", drift_model=None):
+    global _tx_clock, _plan_cache, _interpolation, _drift_model
+    _tx_clock = tx_clock
+    _plan_cache = plan_cache
+    _interpolation = interpolation
+    _drift_model = drift_model
+
+
+def _syncReceiver(RX_spec):
+    # Load and sync a receiver in a worker process
+    dataSyncerRX = DataSyncerRX(**{"verbose": False, **RX_spec})
+    dataSyncerRX.syncSensorData(_tx_clock, plan_cache=_plan_cache, interpolation=_interpolation, drift_model=_drift_model)
+    return dataSyncerRX.sensor_np, dataSyncerRX.sensor_columns
+
+
+class SessionSyncer:
+    # SessionSyncer, loads and syncs the receivers (RX) of a session against a transmitter (TX) in a process pool
+
+    def __init__(self, TX_Syncer, RX_specs, num_workers=None, plan_cache=None, verbose=True, interpolation="linear", drift_model=None):
+
+        self.__TX_Syncer = TX_Syncer  # DataSyncerTX of the session
+        # list of receivers, each a dict with the DataSyncerRX arguments (id, sync_log_path, sensor_log_path, num_sensors, ...)
+        self.__RX_specs = list(RX_specs)
+        self.__num_workers = num_workers  # number of worker processes, defaults to the number of cores
+        self.__plan_cache = plan_cache  # optional SyncPlanCache used by the workers
+        self.__verbose = verbose  # print info messages
+        self.__interpolation = interpolation  # interpolation mode of the missing frames, see DataSyncerRX.syncSensorData
+        self.__drift_model = drift_model  # clock-drift model, see DataSyncerRX.syncSensorData
+
+        self.__synced = None  # synced sensor data of each receiver, by id
+        self.__columns = None  # sensor column names of each receiver, by id
+
+    # Property getters
+    @property
+    def TX_Syncer(self):
+        return self.__TX_Syncer
+
+    @property
+    def RX_specs(self):
+        return self.__RX_specs
+
+    @property
+    def synced(self):
+        # the receivers are synced on first access if sync has not been called
+        if self.__synced is None:
+            self.sync()
+        return self.__synced
+
+    @property
+    def length(self):
+        # length in frames of the data common to all devices
+        return min([len(self.TX_Syncer.sensor_np), *[len(sensor) for sensor in self.synced.values()]])
+
+    @property
+    def columns(self):
+        synced = self.synced
+        return [*self.TX_Syncer.sensor_columns, *[column for id in synced for column in self.__columns[id]]]
+
+    @property
+    def combined(self):
+        # TX and synced RX sensor data side by side, trimmed to the frames common to all devices
+        return np.hstack([self.TX_Syncer.sensor_np[:self.length], *[sensor[:self.length] for sensor in self.synced.values()]])
+
+    def sync(self):
+        # Load and sync all receivers in parallel. Returns the synced sensor data of each receiver, by id and in the order of RX_specs
+
+        if self.__verbose:
+            print("Syncing {} receivers against {}...".format(
+                len(self.RX_specs), self.TX_Syncer.id))
+
+        tx_clock = TXClock(self.TX_Syncer.id, self.TX_Syncer.d_clock, self.TX_Syncer.sync_log_path)
+
+        with ProcessPoolExecutor(max_workers=self.__num_workers, initializer=_initWorker,
+                                 initargs=(tx_clock, self.__plan_cache, self.__interpolation, self.__drift_model)) as executor:
+            results = list(executor.map(_syncReceiver, self.RX_specs))
+
+        self.__synced = {spec["id"]: sensor for spec, (sensor, _) in zip(self.RX_specs, results)}
+        self.__columns = {spec["id"]: columns for spec, (_, columns) in zip(self.RX_specs, results)}
+
+        return self.__synced
@@ -0,0 +1,263 @@
+# Vectorized block-resampling engine used by DataSyncerRX.syncSensorData
+
+import numpy as np
+
+from .SyncModes import INTERPOLATION_MODES, DRIFT_MODELS
+
+SINC_HALF_WIDTH = 8  # frames on each side of a missing frame used by the windowed sinc interpolation
+INTERPOLATION_MARGIN = SINC_HALF_WIDTH  # frames around a window of the sensor data needed to interpolate its missing frames
+INTERPOLATION_CHUNK = 1 << 16  # missing frames interpolated at once, bounds the memory used by resample
+FLOAT32_EXACT_FRAMES = 2 ** 24  # frames up to which float32 framesElapsed values are exact
+
+
+def unwrapFrames(frames_elapsed):
+    # int64 frame counters from the float32 framesElapsed values of a sync log. Past 2^24 frames float32 can no longer represent every frame, so each value only bounds its frame to the float32 rounding interval around it. Within that interval, the frame predicted from the last known frame (the last exact one, or the last one the prediction had to be clamped to the rounding interval of) plus a whole number of intervals between clock signals is chosen, so that the rounding does not show up as extra or missing frames. The interval is the mean spacing of the exact frames (not rounded to whole frames, so that the clock drift of the device does not build up in the predictions) and is always estimated from the log itself, so that every reader of a sync log gets the same counters. The counters of the first n values do not depend on the values after them, so a growing log can be unwrapped again as it grows
+    values = np.asarray(frames_elapsed, dtype=np.float32)
+    frames = values.astype(np.int64)
+    inexact = np.flatnonzero(np.abs(values) > FLOAT32_EXACT_FRAMES)
+    if not len(inexact):
+        return frames
+
+    exact = frames[:inexact[0]]
+    spacings = np.diff(exact if len(exact) > 1 else frames)
+    # mean spacing of the clock signals (periods counts the missed ones), the rounding averages out
+    periods = np.maximum(np.rint(spacings / max(np.median(spacings), 1)), 1) if len(spacings) else np.ones(1)
+    interval = max(spacings.sum() / periods.sum(), 1.0)
+    if len(exact) <= 1 and len(spacings):
+        # estimated from inexact values, the interval is only known to within their float32 rounding, a whole number of frames within it is taken
+        tolerance = float(np.spacing(np.abs(values[-1]))) / periods.sum()
+        if abs(interval - np.rint(interval)) <= tolerance:
+            interval = float(np.rint(interval))
+
+    # half of the float32 rounding interval of each value
+    half_ulp = (np.spacing(np.abs(values[inexact])).astype(np.int64) // 2).tolist()
+    reconstructed = frames.tolist()
+    anchor = None  # last known frame, the following frames are predicted from it
+    for i, half in zip(inexact.tolist(), half_ulp):
+        if i == 0:
+            continue
+        if anchor is None:
+            anchor = reconstructed[i - 1]
+        predicted = anchor + round(max(round((frames[i] - anchor) / interval), 0) * interval)
+        clamped = min(max(predicted, frames[i] - half), frames[i] + half)
+        if clamped != predicted:
+            anchor = clamped  # the prediction left the rounding interval, predict from the clamped frame on
+        reconstructed[i] = clamped
+
+    return np.array(reconstructed, dtype=np.int64)
+
+
+def blockCorrections(sync_frames, d_clock):
+    # Number of frames to drop (>0) or to insert (<0) in each block between consecutive clock signals so that every block spans a multiple of d_clock frames. If the RX missed some clock signals, the block is 'unwrapped' to the nearest multiple of d_clock (and at least one d_clock)
+    spans = np.diff(np.asarray(sync_frames, dtype=np.int64))
+    periods = np.maximum(np.rint(spans / d_clock), 1).astype(np.int64)
+    return spans - periods * d_clock
+
+
+def _ranges(starts, lengths):
+    # Concatenation of np.arange(start, start + length) for each start, length pair, without a Python loop
+    lengths = np.asarray(lengths, dtype=np.int64)
+    total = lengths.sum()
+    if total == 0:
+        return np.empty(0, dtype=np.int64)
+    offsets = np.repeat(np.cumsum(lengths) - lengths, lengths)
+    return np.repeat(np.asarray(starts, dtype=np.int64), lengths) + np.arange(total) - offsets
+
+
+def rowCounts(block_ends, corrections, start, stop, num_rows):
+    # Number of times each row in [start, stop) of the offset sensor data (row 0 is the frame at which the first clock signal was received) appears in the synced data, 0 if it is dropped. Extra frames are dropped at the end of their block (up to and including the frame at which the next clock signal was received) and missing frames are inserted right after it, as repeats of the following frame (see syncPositions)
+    block_ends = np.asarray(block_ends, dtype=np.int64)
+    corrections = np.asarray(corrections, dtype=np.int64)
+    counts = np.ones(stop - start, dtype=np.int64)
+
+    # the frames dropped from the last block all fall within it
+    drop = corrections > 0
+    dropped = _ranges(np.minimum(block_ends[drop] - corrections[drop] + 1, num_rows - corrections[drop]), corrections[drop])
+    dropped = dropped[(dropped >= start) & (dropped < min(stop, num_rows))]
+    counts[dropped - start] = 0
+
+    insert = corrections < 0
+    repeated = np.minimum(block_ends[insert] + 1, num_rows - 1)
+    in_window = (repeated >= start) & (repeated < stop)
+    np.add.at(counts, repeated[in_window] - start, -corrections[insert][in_window])
+
+    return counts
+
+
+def syncIndexMap(sync_frames, corrections):
+    # Index map from synced frames to rows of the offset sensor data
+    sync_frames = np.asarray(sync_frames, dtype=np.int64)
+    num_rows = int(sync_frames[-1] - sync_frames[0])
+    if num_rows <= 0:
+        return np.empty(0, dtype=np.int64)
+
+    # end of each block, relative to the first clock signal
+    block_ends = sync_frames[1:] - sync_frames[0]
+
+    return np.repeat(np.arange(num_rows), rowCounts(block_ends, corrections, 0, num_rows, num_rows))
+
+
+def outputStarts(sync_frames, corrections):
+    # Index in the synced data of the first frame produced by each block, and the length of the synced data as last element
+    sync_frames = np.asarray(sync_frames, dtype=np.int64)
+    corrections = np.asarray(corrections, dtype=np.int64)
+    block_starts = sync_frames - sync_frames[0]
+
+    # frames dropped/inserted by the previous blocks. The frame at which a clock signal was received is dropped with the previous block, but counted in the next one, and the frames inserted after it are produced by the next block
+    previous = np.concatenate([[0], corrections])
+    starts = block_starts - np.cumsum(previous) + (previous > 0) + np.minimum(previous, 0)
+    starts[-1] = block_starts[-1] - corrections.sum()
+    return starts
+
+
+def syncPositions(index_map):
+    # Position of each synced frame in the offset sensor data: the row for kept frames and a fractional position for the missing frames, which are evenly spaced between the frame at which the clock signal was received and the following frame (the run of repeated rows in the index map)
+    index_map = np.asarray(index_map, dtype=np.int64)
+    if not len(index_map):
+        return np.empty(0, dtype=np.float64)
+
+    run_starts = np.concatenate([[0], np.flatnonzero(np.diff(index_map)) + 1])
+    run_lengths = np.diff(np.concatenate([run_starts, [len(index_map)]]))
+    run_index = np.arange(len(index_map)) - np.repeat(run_starts, run_lengths)  # position within the run
+    return index_map - 1 + (run_index + 1) / np.repeat(run_lengths, run_lengths)
+
+
+def windowIndexMap(sync_frames, corrections, start, stop, positions=False):
+    # Index map of the synced frames [start, stop) only, computed from the blocks covering the window. With positions=True, the syncPositions of the synced frames are returned instead
+    sync_frames = np.asarray(sync_frames, dtype=np.int64)
+    corrections = np.asarray(corrections, dtype=np.int64)
+    num_rows = int(sync_frames[-1] - sync_frames[0])
+    block_ends = sync_frames[1:] - sync_frames[0]
+
+    starts = outputStarts(sync_frames, corrections)
+    start, stop = max(start, 0), min(stop, starts[-1])
+    if stop <= start:
+        return np.empty(0, dtype=np.float64 if positions else np.int64)
+
+    # blocks producing the window
+    first = max(np.searchsorted(starts, start, side='right') - 1, 0)
+    last = min(np.searchsorted(starts, stop, side='left'), len(corrections))
+    row_start = sync_frames[first] - sync_frames[0]
+    row_stop = sync_frames[last] - sync_frames[0]
+
+    counts = rowCounts(block_ends[max(first - 1, 0):last], corrections[max(first - 1, 0):last], row_start, row_stop, num_rows)
+    index_map = np.repeat(np.arange(row_start, row_stop), counts)
+    if positions:  # before slicing, so that the runs of missing frames are complete
+        index_map = syncPositions(index_map)
+    return index_map[start - starts[first]:stop - starts[first]]
+
+
+def checkInterpolation(interpolation):
+    if interpolation not in INTERPOLATION_MODES:
+        raise ValueError("interpolation must be one of {}, not {!r}".format(INTERPOLATION_MODES, interpolation))
+
+
+def _interpolationWeights(fractions, interpolation):
+    # Offsets (relative to the frame before each missing frame) and weights (missing frames x offsets) of the frames each missing frame is interpolated from
+    f = fractions[:, None]
+    if interpolation == "linear":
+        return np.array([0, 1]), np.hstack([1 - f, f])
+    if interpolation == "cubic":  # Catmull-Rom spline
+        return np.array([-1, 0, 1, 2]), np.hstack([
+            (-f**3 + 2 * f**2 - f) / 2,
+            (3 * f**3 - 5 * f**2 + 2) / 2,
+            (-3 * f**3 + 4 * f**2 + f) / 2,
+            (f**3 - f**2) / 2])
+    # windowed sinc (Hann window), normalised so that constant signals are preserved
+    offsets = np.arange(-SINC_HALF_WIDTH + 1, SINC_HALF_WIDTH + 1)
+    distance = offsets - f
+    weights = np.sinc(distance) * 0.5 * (1 + np.cos(np.pi * distance / SINC_HALF_WIDTH))
+    return offsets, weights / weights.sum(axis=1, keepdims=True)
+
+
+def resample(sensor, positions, interpolation="linear"):
+    # Assemble the synced sensor data from the syncPositions of the synced frames in the offset sensor data: the frames at integer positions are gathered and all missing frames are then interpolated in one pass ("linear", "cubic" or windowed "sinc", from the neighbouring frames, clipped to the rows of sensor). With "hold" the missing frames take the value of the following frame (as in versions before interpolation modes were added)
+    checkInterpolation(interpolation)
+
+    positions = np.asarray(positions)
+    index_map = np.ceil(positions).astype(np.int64)
+    synced = np.take(sensor, index_map, axis=0)
+    if interpolation == "hold":
+        return synced
+
+    missing = np.flatnonzero(positions != index_map)
+    if not len(missing):
+        return synced
+
+    for chunk in range(0, len(missing), INTERPOLATION_CHUNK):
+        frames = missing[chunk:chunk + INTERPOLATION_CHUNK]
+        before = np.floor(positions[frames]).astype(np.int64)
+        offsets, weights = _interpolationWeights(positions[frames] - before, interpolation)
+        rows = np.clip(before[:, None] + offsets, 0, len(sensor) - 1)
+        neighbours = np.take(sensor, rows, axis=0).astype(np.float64)  # missing frames x offsets x sensors
+        synced[frames] = np.einsum('mo,mos->ms', weights, neighbours)
+    return synced
+
+
+def syncBlocks(read_rows, sync_frames, corrections, first_block, num_rows, readable_rows, interpolation="linear"):
+    # Generator of the synced frames of each block of the offset sensor data from first_block on, syncing one block at a time (used by DataSyncerRX.syncSensorDataStream and LiveSyncer). read_rows(first, last) reads the rows [first, last) of the offset sensor data (without framesElapsed): only the rows of a block and the rows around it the missing frames are interpolated from are read, up to readable_rows. Stops at the first block whose rows are not all readable yet. num_rows is the number of rows of the offset sensor data, whose last block drops its extra frames within it
+    sync_frames = np.asarray(sync_frames, dtype=np.int64)
+    for i in range(first_block, len(corrections)):
+        # end of the previous and this block, relative to the first clock signal
+        block_ends = sync_frames[max(i - 1, 0) + 1:i + 2] - sync_frames[0]
+        start, stop = sync_frames[i] - sync_frames[0], block_ends[-1]
+        if stop > readable_rows:
+            return
+
+        # read the block and the frames around it the missing frames are interpolated from
+        first, last = max(start - INTERPOLATION_MARGIN, 0), min(stop + INTERPOLATION_MARGIN, readable_rows)
+        block = read_rows(first, last)
+
+        # only the corrections of this and the previous block affect the rows of this block
+        counts = rowCounts(block_ends, corrections[max(i - 1, 0):i + 1], start, stop, num_rows)
+        positions = syncPositions(np.repeat(np.arange(start, stop), counts))
+        yield resample(block, positions - first, interpolation)
+
+
+def fillBlocks(pending, frames, d_clock):
+    # Append synced frames to pending (synced frames which do not fill a d_clock block yet) and split off the complete blocks. Returns the complete frames (a multiple of d_clock, possibly none) and the new pending frames
+    pending = np.concatenate([pending, frames])
+    num_complete = len(pending) // d_clock * d_clock
+    return pending[:num_complete], pending[num_complete:]
+
+
+def clockCorrespondence(sync_frames, corrections, d_clock):
+    # Frame of the transmitter (TX) at which each clock signal was sent and row of the offset sensor data of the receiver (RX) at which it was received, both relative to the first clock signal. Missed clock signals are unwrapped via d_clock
+    sync_frames = np.asarray(sync_frames, dtype=np.int64)
+    periods = (np.diff(sync_frames) - np.asarray(corrections, dtype=np.int64)) // d_clock
+    return np.concatenate([[0], np.cumsum(periods) * d_clock]), sync_frames - sync_frames[0]
+
+
+def robustLine(x, y, iterations=10):
+    # Intercept and slope of a line fitted to (x, y) by iteratively reweighted least squares with Huber weights, so that a few outliers (e.g. late clock signals) do not bias the fit
+    x, y = np.asarray(x, dtype=np.float64), np.asarray(y, dtype=np.float64)
+    weights = np.ones(len(x))
+    for _ in range(iterations):
+        slope, intercept = np.polyfit(x, y, 1, w=np.sqrt(weights))
+        residuals = np.abs(y - (intercept + slope * x))
+        threshold = 1.345 * 1.4826 * np.median(residuals)
+        if threshold == 0:
+            break
+        weights = np.minimum(1, threshold / np.maximum(residuals, threshold))
+    return intercept, slope
+
+
+def driftModel(sync_frames, corrections, d_clock, model="piecewise"):
+    # Clock-drift model of the RX/TX clock correspondence, as a function mapping synced frames (TX frames after the first clock signal) to positions in the offset sensor data of the RX, an alternative to dropping and inserting frames at the end of the blocks: "piecewise" maps each block linearly onto d_clock frames (the extra or missing frames are spread over the block) and "robust" fits a single line to all clock signals
+    if model not in DRIFT_MODELS:
+        raise ValueError("drift model must be one of {}, not {!r}".format(DRIFT_MODELS, model))
+
+    tx_frames, rx_frames = clockCorrespondence(sync_frames, corrections, d_clock)
+    last_row = max(rx_frames[-1] - 1, 0)  # positions past the last row (e.g. in a last block missing frames) are clipped to it
+    if model == "piecewise":
+        return lambda frames: np.clip(np.interp(frames, tx_frames, rx_frames), 0, last_row)
+
+    intercept, slope = robustLine(tx_frames, rx_frames)
+    return lambda frames: np.clip(intercept + slope * np.asarray(frames, dtype=np.float64), 0, last_row)
+
+
+def driftPositions(sync_frames, corrections, d_clock, model="piecewise", start=0, stop=None):
+    # Positions of the synced frames [start, stop) (all of them if stop is None) given by a driftModel
+    num_synced = int(clockCorrespondence(sync_frames, corrections, d_clock)[0][-1])
+    stop = num_synced if stop is None else min(stop, num_synced)
+    return driftModel(sync_frames, corrections, d_clock, model)(np.arange(max(start, 0), max(stop, start, 0), dtype=np.float64))
@@ -0,0 +1,4 @@
+# Interpolation modes and drift models of the sync, shared by SyncEngine and the bela-data-syncer command line tool (this module does not import numpy)
+
+INTERPOLATION_MODES = ("hold", "linear", "cubic", "sinc")
+DRIFT_MODELS = ("piecewise", "robust")
@@ -0,0 +1,93 @@
+# SyncPlanCache class, on-disk cache of sync plans
+
+import hashlib
+import os
+
+import numpy as np
+
+PLAN_VERSION = 2  # part of every key, bumped whenever plans computed from the same sync logs change (2: frame counters unwrapped past 2^24 frames, see SyncEngine.unwrapFrames), so that plans cached by earlier versions are never used
+
+class SyncPlanCache:
+    # SyncPlanCache, stores the sync plan computed by DataSyncerRX.syncSensorData (number of frames dropped (>0) or interpolated (<0) in each block) keyed by the content of the RX and TX sync logs, d_clock and PLAN_VERSION. A changed log gives a new key, so stale plans are never used and are evicted eventually
+    # Since the sync is vectorized, computing a plan (one np.diff over the sync frames) is cheaper than hashing the sync logs and loading it, so the cache does not make syncing faster: it only keeps the plan each recording was synced with, e.g. to check which recordings would be synced differently after changing the logs. Several processes can share a cache directory
+
+    def __init__(self, cache_dir, max_size=64 * 1024 * 1024):
+
+        self.__cache_dir = cache_dir  # directory where the plans are stored
+        self.__max_size = max_size  # maximum size in bytes of the cache, least recently used plans are evicted first
+
+        os.makedirs(self.__cache_dir, exist_ok=True)
+
+    # Property getters
+    @property
+    def cache_dir(self):
+        return self.__cache_dir
+
+    @property
+    def max_size(self):
+        return self.__max_size
+
+    def key(self, RX_sync_log_path, TX_sync_log_path, d_clock):
+        # Hash of the content of the sync logs, d_clock and the plan version
+        h = hashlib.sha1("plan-v{}".format(PLAN_VERSION).encode())
+        for path in [RX_sync_log_path, TX_sync_log_path]:
+            if path is not None:
+                with open(path, 'rb') as f:
+                    h.update(f.read())
+            h.update(b'\0')
+        h.update(str(d_clock).encode())
+        return h.hexdigest()
+
+    def __path(self, key):
+        return os.path.join(self.cache_dir, "{}.npy".format(key))
+
+    def load(self, key, num_blocks=None):
+        # Returns the stored plan or None if there is no plan for key. num_blocks, if given, is the number of blocks of the RX sync log (one less than its clock signals): a plan of another length does not belong to it and is not used
+        path = self.__path(key)
+        try:
+            plan = np.load(path)
+            os.utime(path)  # mark as recently used
+        except (OSError, ValueError):  # missing, partially evicted or evicted by another process meanwhile
+            return None
+        if num_blocks is not None and len(plan) != num_blocks:
+            return None
+        return plan
+
+    def save(self, key, plan):
+        # Store a plan and evict the least recently used plans if the cache exceeds max_size
+        path = self.__path(key)
+        tmp_path = "{}.{}.tmp".format(path, os.getpid())
+        with open(tmp_path, 'wb') as f:
+            np.save(f, np.asarray(plan, dtype=np.int64))
+        os.replace(tmp_path, path)  # other processes never read a partially written plan
+        self.evict()
+
+    def evict(self):
+        # Remove the least recently used plans until the cache fits in max_size
+        entries = []
+        for fn in os.listdir(self.cache_dir):
+            if fn.endswith(".npy"):
+                try:
+                    stat = os.stat(os.path.join(self.cache_dir, fn))
+                except FileNotFoundError:  # already evicted by another process
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, fn))
+
+        size = sum(entry[1] for entry in entries)
+        for _, entry_size, fn in sorted(entries):
+            if size <= self.max_size:
+                break
+            try:
+                os.remove(os.path.join(self.cache_dir, fn))
+            except FileNotFoundError:  # already evicted by another process
+                pass
+            size -= entry_size
+
+    def clear(self):
+        # Remove all plans
+        for fn in os.listdir(self.cache_dir):
+            if fn.endswith(".npy"):
+                try:
+                    os.remove(os.path.join(self.cache_dir, fn))
+                except FileNotFoundError:  # already evicted by another process
+                    pass
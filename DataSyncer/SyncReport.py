@@ -0,0 +1,84 @@
+# SyncReport class, timings and sync quality statistics of a Data object
+
+import time
+from contextlib import contextmanager, nullcontext
+
+import numpy as np
+
+
+class SyncReport:
+    # SyncReport, collects the time spent in each phase (load, offset, sync, save) and the per-block sync counters (frames dropped, frames interpolated and clock signals missed) of a Data object. profiler, if set, is called with the phase name before each phase and must return a context manager that wraps the phase (e.g. lambda phase: cProfile.Profile())
+
+    def __init__(self, id, profiler=None):
+
+        self.id = id  # Bela id
+        self.profiler = profiler  # optional profiling hook
+        self.synced_to_id = None  # id of the transmitter the data has been synced to
+        self.d_clock = None  # d_clock of the transmitter
+        self.drift_model = None  # drift model the data was resampled with, None if frames were dropped and interpolated
+
+        self.timings = {}  # seconds spent in each phase, accumulated if a phase runs more than once
+        self.offset_frames = 0  # frames recorded before the first and after the last clock signal
+
+        # per-block counters, one value for each block between consecutive clock signals
+        self.corrections = np.empty(0, dtype=np.int64)  # frames the RX clock ran ahead (>0) or behind (<0) of the TX clock
+        self.dropped = np.empty(0, dtype=np.int64)  # extra frames dropped
+        self.interpolated = np.empty(0, dtype=np.int64)  # missing frames interpolated
+        self.missed_clocks = np.empty(0, dtype=np.int64)  # clock signals missed (unwrapped via d_clock)
+
+    @contextmanager
+    def phase(self, name):
+        # Time (and profile) the code run within the context
+        with (self.profiler(name) if self.profiler is not None else nullcontext()):
+            start = time.perf_counter()
+            try:
+                yield
+            finally:
+                self.addTiming(name, time.perf_counter() - start)
+
+    def addTiming(self, name, seconds):
+        # Add time spent in a phase that was timed elsewhere, e.g. a read run in an I/O thread (only the thread using the Data object updates the timings)
+        self.timings[name] = self.timings.get(name, 0) + seconds
+
+    def setBlocks(self, sync_frames, corrections, d_clock, drift_model=None):
+        # Per-block counters from the frames at which the clock signals were received and the number of frames dropped (>0) or interpolated (<0) in each block. With a drift_model, no frames are dropped or interpolated (the corrections only count towards the drift)
+        periods = (np.diff(np.asarray(sync_frames, dtype=np.int64)) - corrections) // d_clock
+        self.d_clock = d_clock
+        self.drift_model = drift_model
+        self.corrections = np.asarray(corrections, dtype=np.int64)
+        resampled = drift_model is not None
+        self.dropped = np.zeros_like(self.corrections) if resampled else np.maximum(self.corrections, 0)
+        self.interpolated = np.zeros_like(self.corrections) if resampled else np.maximum(-self.corrections, 0)
+        self.missed_clocks = periods - 1
+
+    @property
+    def num_blocks(self):
+        return len(self.corrections)
+
+    @property
+    def drift(self):
+        # clock drift of the RX relative to the TX (extra frames per TX frame, e.g. 20e-6 is 20 ppm)
+        num_frames = (self.num_blocks + self.missed_clocks.sum()) * self.d_clock if self.d_clock else 0
+        return self.corrections.sum() / num_frames if num_frames else 0.0
+
+    def summary(self):
+        # Report as a dict of plain values, e.g. to be tracked across a fleet of recordings
+        return {
+            "id": self.id,
+            "synced_to_id": self.synced_to_id,
+            "d_clock": self.d_clock,
+            "drift_model": self.drift_model,
+            "timings": dict(self.timings),
+            "offset_frames": int(self.offset_frames),
+            "num_blocks": self.num_blocks,
+            "dropped_frames": int(self.dropped.sum()),
+            "interpolated_frames": int(self.interpolated.sum()),
+            "missed_clocks": int(self.missed_clocks.sum()),
+            "blocks_dropped": int(np.count_nonzero(self.dropped)),
+            "blocks_interpolated": int(np.count_nonzero(self.interpolated)),
+            "max_correction": int(max(self.dropped.max(initial=0), self.interpolated.max(initial=0))),
+            "drift": float(self.drift),
+        }
+
+    def __repr__(self):
+        return "SyncReport({})".format(self.summary())
@@ -0,0 +1,187 @@
+# bela-data-syncer command line tool, syncs the logs of whole session directories
+#
+# Only the standard library (and the modules of the package which do not import numpy) is imported at startup: sessions whose synced files are up to date are skipped without importing numpy, and the syncing modules are imported by the worker processes
+
+import argparse
+import os
+import re
+import sys
+
+from .SyncModes import INTERPOLATION_MODES, DRIFT_MODELS
+from .SyncedDataFile import readSyncedDataHeader
+
+_log_pattern = re.compile(r"^(?P<id>.+)-(?P<log>sync|data)\.log$")  # as in Catalog
+
+
+def findSessions(paths, recursive=False):
+    # Session directories among paths (and their subdirectories if recursive=True), each with its name (its path relative to the parent of the path it was found in, as in Catalog) and the sync and sensor logs of its devices, by id
+    sessions = {}
+    for path in paths:
+        root = os.path.basename(os.path.normpath(path))
+        for dirpath, dirnames, filenames in (os.walk(path) if recursive else [(path, [], os.listdir(path))]):
+            dirnames.sort()
+            logs = {}
+            for fn in sorted(filenames):
+                match = _log_pattern.match(fn)
+                if match:
+                    logs.setdefault(match["id"], {})[match["log"]] = os.path.join(dirpath, fn)
+            if logs:
+                sessions[dirpath] = (os.path.normpath(os.path.join(root, os.path.relpath(dirpath, path))), logs)
+    return sessions
+
+
+def syncedPath(session, name, id, output_dir=None):
+    # Path of the synced file of a device, in the session directory or under output_dir at the name of the session (e.g. OUTPUT_DIR/recordings/day1/take1), so that sessions with the same directory name do not collide
+    directory = session if output_dir is None else os.path.join(output_dir, name)
+    return os.path.join(directory, "{}-synced.bin".format(id))
+
+
+def syncSettings(args):
+    # Settings which change the synced data, stored in the header of each synced file
+    return {"d_clock": args.d_clock, "num_sensors": args.num_sensors, "interpolation": args.interpolation, "drift_model": args.drift_model}
+
+
+def isUpToDate(output_path, input_paths, settings):
+    # Whether output_path exists, is newer than all input_paths and was synced with settings
+    try:
+        output_mtime = os.path.getmtime(output_path)
+        header = readSyncedDataHeader(output_path, chunk_index=False)
+    except (OSError, ValueError):
+        return False
+    return header.get("sync_settings") == settings and all(os.path.getmtime(path) <= output_mtime for path in input_paths)
+
+
+def sessionTasks(session, name, logs, args):
+    # One task per device of a session (the TX is offset and each RX synced to it), or an error message if the session cannot be synced
+    TX_ids = [id for id in logs if id.startswith("TX")]
+    if len(TX_ids) != 1:
+        return None, "expected one TX, found {}".format(len(TX_ids))
+    TX_id = TX_ids[0]
+
+    incomplete = [id for id, paths in logs.items() if set(paths) != {"sync", "data"}]
+    if incomplete:
+        return None, "missing sync or sensor log of {}".format(", ".join(incomplete))
+
+    tasks = []
+    for id, paths in logs.items():
+        inputs = [paths["sync"], paths["data"], logs[TX_id]["sync"]]
+        tasks.append({
+            "session": session,
+            "id": id,
+            "sync_log_path": paths["sync"],
+            "sensor_log_path": paths["data"],
+            "TX_id": TX_id,
+            "TX_sync_log_path": logs[TX_id]["sync"],
+            "output_path": syncedPath(session, name, id, args.output_dir),
+            "inputs": inputs,
+            "settings": syncSettings(args),
+            "num_sensors": args.num_sensors,
+            "d_clock": args.d_clock,
+            "interpolation": args.interpolation,
+            "drift_model": args.drift_model,
+        })
+    return tasks, None
+
+
+def _syncDevice(task):
+    # Sync a device in a worker process and write its synced file, streaming the logs block by block. Returns the summary of its SyncReport
+    from .Catalog import sensorLogColumns
+    from .DataSyncer import DataSyncerTX, DataSyncerRX
+    from .SessionSyncer import TXClock
+
+    num_sensors = task["num_sensors"]
+    if num_sensors is None:
+        num_columns = sensorLogColumns(task["sensor_log_path"])
+        if num_columns is None:
+            raise ValueError("number of sensors of {} cannot be inferred, pass --num-sensors".format(task["sensor_log_path"]))
+        num_sensors = num_columns - 1
+
+    d_clock = task["d_clock"]
+    os.makedirs(os.path.dirname(task["output_path"]), exist_ok=True)
+    tmp_path = "{}.{}.tmp".format(task["output_path"], os.getpid())
+
+    try:
+        if task["id"] == task["TX_id"]:
+            TX = DataSyncerTX(task["id"], task["sync_log_path"], task["sensor_log_path"], num_sensors, d_clock=d_clock, verbose=False)
+            num_frames = int(TX.sync_frames[-1] - TX.sync_frames[0])
+            blocks = (TX.sensorDataWindow(start, start + d_clock) for start in range(0, num_frames, d_clock))
+            TX.saveSyncedData(tmp_path, blocks=blocks, metadata={"sync_settings": task["settings"]})
+            report = TX.report
+        else:
+            RX = DataSyncerRX(task["id"], task["sync_log_path"], task["sensor_log_path"], num_sensors, verbose=False)
+            TX_clock = TXClock(task["TX_id"], d_clock, task["TX_sync_log_path"])
+            blocks = RX.syncSensorDataStream(TX_clock, interpolation=task["interpolation"], drift_model=task["drift_model"])
+            RX.saveSyncedData(tmp_path, blocks=blocks, metadata={"synced_to_id": task["TX_id"], "d_clock": d_clock, "sync_settings": task["settings"]})
+            report = RX.report
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+    os.replace(tmp_path, task["output_path"])  # an interrupted run never leaves an up to date looking file
+    return report.summary()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="bela-data-syncer",
+        description="Sync the sensor logs of Bela session directories (TXn/RXn-sync.log and -data.log) and write one synced file per device, readable with SyncedDataLoader.")
+    parser.add_argument("sessions", nargs="+", help="session directories")
+    parser.add_argument("-r", "--recursive", action="store_true", help="also sync the sessions in subdirectories")
+    parser.add_argument("-o", "--output-dir", help="write the synced files to OUTPUT_DIR/<session> instead of the session directories (<session> is the path of a session relative to the parent of the directory it was found in)")
+    parser.add_argument("-j", "--jobs", type=int, default=None, help="number of worker processes (default: number of cores)")
+    parser.add_argument("--d-clock", type=int, default=689 * 8 + 8, help="interval in frames between clock signals (default: %(default)s)")
+    parser.add_argument("--num-sensors", type=int, default=None, help="number of sensors of each device (default: inferred from the sensor logs)")
+    parser.add_argument("--interpolation", choices=INTERPOLATION_MODES, default="linear", help="interpolation of missing frames (default: %(default)s)")
+    parser.add_argument("--drift-model", choices=DRIFT_MODELS, default=None, help="resample with a clock-drift model instead of dropping/inserting frames")
+    parser.add_argument("-f", "--force", action="store_true", help="sync sessions whose synced files are up to date (newer than the logs and synced with the same settings)")
+    parser.add_argument("-q", "--quiet", action="store_true", help="only print errors")
+    args = parser.parse_args(argv)
+
+    tasks = []
+    failed = False
+    outputs = {}  # session writing each synced file
+    for session, (name, logs) in findSessions(args.sessions, args.recursive).items():
+        session_tasks, error = sessionTasks(session, name, logs, args)
+        if error is None:
+            collisions = [outputs[task["output_path"]] for task in session_tasks if task["output_path"] in outputs]
+            if collisions:
+                error = "its synced files would overwrite those of {}".format(collisions[0])
+        if error is not None:
+            print("Skipping {}: {}".format(session, error), file=sys.stderr)
+            failed = True
+            continue
+        outputs.update((task["output_path"], session) for task in session_tasks)
+        if not args.force and all(isUpToDate(task["output_path"], task["inputs"], task["settings"]) for task in session_tasks):
+            if not args.quiet:
+                print("{} is up to date".format(session))
+            continue
+        tasks.extend(session_tasks)
+
+    if not tasks:
+        return int(failed)
+
+    from concurrent.futures import ProcessPoolExecutor, as_completed
+
+    with ProcessPoolExecutor(max_workers=args.jobs) as executor:
+        futures = {executor.submit(_syncDevice, task): task for task in tasks}
+        for future in as_completed(futures):
+            task = futures[future]
+            try:
+                summary = future.result()
+            except Exception as e:
+                print("Failed to sync {} {}: {}".format(task["session"], task["id"], e), file=sys.stderr)
+                failed = True
+                continue
+            if not args.quiet and summary["drift_model"] is not None:
+                print("Synced {} {} -> {} (resampled with the {} drift model, {:.1f} ppm drift)".format(
+                    task["session"], task["id"], task["output_path"], summary["drift_model"], summary["drift"] * 1e6))
+            elif not args.quiet:
+                print("Synced {} {} -> {} ({} dropped, {} interpolated frames)".format(
+                    task["session"], task["id"], task["output_path"], summary["dropped_frames"], summary["interpolated_frames"]))
+
+    return int(failed)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,94 @@
+# Self-describing chunked file format for synced sensor data
+#
+# The file starts with a magic string, the format version and a JSON header (id, columns, sample_rate, synced_to_id, d_clock, chunk_frames). The sensor data follows as float32 chunks of chunk_frames frames (the last chunk can be shorter), and the file ends with the chunk index (byte offset and number of frames of each chunk) and a trailer pointing to it, so that data can be written block by block and read back at random.
+#
+# Only the standard library is imported at module level (numpy is imported by the functions reading or writing the sensor data), so that the command line tool can read the header of a synced file without importing numpy
+#
+# | MAGIC | version (u4) | header size (u4) | header | chunk 0 | ... | chunk n-1 | chunk index (n x 2 i8) | index offset (u8) | n (u8) | MAGIC |
+
+import json
+import struct
+
+MAGIC = b"BELASYNC"
+VERSION = 1
+
+_prefix = struct.Struct("<8sII")  # magic, version, header size
+_trailer = struct.Struct("<QQ8s")  # index offset, number of chunks, magic
+
+
+def isSyncedDataFile(path):
+    # Whether the file at path is in the chunked format (otherwise it is headerless float32 data)
+    with open(path, 'rb') as f:
+        return f.read(len(MAGIC)) == MAGIC
+
+
+def writeSyncedData(filepath, blocks, header, chunk_frames):
+    # Write blocks (iterable of 2D arrays with one column per header column) to filepath in chunks of chunk_frames frames. Full chunks are written straight from the blocks, only frames which do not fill a chunk are buffered
+    import numpy as np
+
+    num_columns = len(header["columns"])
+    header = {**header, "dtype": "<f4", "chunk_frames": int(chunk_frames)}
+    header_bytes = json.dumps(header).encode("utf-8")
+
+    with open(filepath, 'w+b') as f:
+        f.write(_prefix.pack(MAGIC, VERSION, len(header_bytes)))
+        f.write(header_bytes)
+
+        chunk_index = []
+
+        def writeChunk(chunk):
+            chunk_index.append((f.tell(), len(chunk)))
+            f.write(np.ascontiguousarray(chunk).data)
+
+        buffer = None  # frames which do not fill a chunk yet
+        for block in blocks:
+            block = np.asarray(block, dtype="<f4").reshape(-1, num_columns)
+
+            if buffer is not None:
+                n = chunk_frames - len(buffer)
+                buffer = np.concatenate([buffer, block[:n]])
+                block = block[n:]
+                if len(buffer) < chunk_frames:
+                    continue
+                writeChunk(buffer)
+                buffer = None
+
+            num_full = len(block) // chunk_frames * chunk_frames
+            for i in range(0, num_full, chunk_frames):
+                writeChunk(block[i:i + chunk_frames])
+            if num_full < len(block):
+                buffer = block[num_full:].copy()
+
+        if buffer is not None:
+            writeChunk(buffer)
+
+        index_offset = f.tell()
+        f.write(np.array(chunk_index, dtype="<i8").reshape(-1, 2).tobytes())
+        f.write(_trailer.pack(index_offset, len(chunk_index), MAGIC))
+
+
+def readSyncedDataHeader(path, chunk_index=True):
+    # Read the header of a chunked synced data file. The chunk index is returned as an array (number of chunks x 2) of byte offsets and number of frames under "chunk_index". With chunk_index=False, only the JSON header is read (numpy is not imported)
+    with open(path, 'rb') as f:
+        magic, version, header_size = _prefix.unpack(f.read(_prefix.size))
+        if magic != MAGIC:
+            raise ValueError('"{}" is not a synced data file'.format(path))
+        if version > VERSION:
+            raise ValueError('"{}" has format version {}, only versions up to {} are supported'.format(
+                path, version, VERSION))
+        header = json.loads(f.read(header_size).decode("utf-8"))
+        header["version"] = version
+        if not chunk_index:
+            return header
+
+        import numpy as np
+        f.seek(-_trailer.size, 2)
+        index_offset, num_chunks, magic = _trailer.unpack(f.read(_trailer.size))
+        if magic != MAGIC:
+            raise ValueError('"{}" is truncated, the chunk index is missing'.format(path))
+        f.seek(index_offset)
+        chunk_index = np.frombuffer(f.read(num_chunks * 16), dtype="<i8").reshape(-1, 2)
+
+    header["chunk_index"] = chunk_index
+    header["num_frames"] = int(chunk_index[:, 1].sum())
+    return header
@@ -1,7 +1,61 @@
+import os
+
 import numpy as np
 
+from .SyncedDataFile import isSyncedDataFile, readSyncedDataHeader
+
+
+def SyncedDataHeader(path):
+    # Header of a file saved with saveSyncedData (id, columns, sample_rate, synced_to_id, d_clock, chunk index...)
+    return readSyncedDataHeader(path)
+
+
+def SyncedDataLoader(path, id=None, num_sensors=None, sensors=None, start=0, stop=None, mmap=False):
+    # Load synced sensor data saved with saveSyncedData as a 2D float32 array (frames x sensors). Only the frames in [start, stop) are read from the file and sensors (sensor numbers starting at 1 or column names "{id}-x{i}") selects the sensor columns. With mmap=True a read-only view of the file is returned instead of reading it into memory. id and num_sensors are only needed for headerless files (saved with raw=True)
+    if isSyncedDataFile(path):
+        header = readSyncedDataHeader(path)
+        columns = header["columns"]
+        chunk_index = header["chunk_index"]
+    else:
+        columns = ["{}-x{}".format(id, str(i)) for i in range(1, num_sensors + 1)]
+        # a headerless file is a single chunk
+        chunk_index = np.array([[0, os.path.getsize(path) // (len(columns) * np.dtype(np.float32).itemsize)]])
+
+    num_columns = len(columns)
+    row_size = num_columns * np.dtype(np.float32).itemsize
+
+    # first frame of each chunk
+    chunk_starts = np.concatenate([[0], np.cumsum(chunk_index[:, 1])])
+    start, stop, _ = slice(start, stop).indices(int(chunk_starts[-1]))
+    count = max(stop - start, 0)
+
+    # byte offset and number of frames of the part of each chunk within [start, stop)
+    segments = []
+    first = np.searchsorted(chunk_starts, start, side='right') - 1
+    for c in range(first, len(chunk_index)):
+        if count == 0 or chunk_starts[c] >= stop:
+            break
+        lo = max(start, chunk_starts[c]) - chunk_starts[c]
+        hi = min(stop, chunk_starts[c + 1]) - chunk_starts[c]
+        segments.append((int(chunk_index[c, 0] + lo * row_size), int(hi - lo)))
+
+    # chunks are contiguous in files written by saveSyncedData, so the window can be mapped or read at once
+    contiguous = all(segments[i][0] + segments[i][1] * row_size == segments[i + 1][0] for i in range(len(segments) - 1))
+
+    if count == 0:
+        loaded = np.empty((0, num_columns), dtype=np.float32)
+    elif mmap and contiguous:
+        loaded = np.memmap(path, dtype=np.float32, mode='r', offset=segments[0][0], shape=(count, num_columns))
+    elif contiguous:
+        loaded = np.fromfile(path, dtype=np.float32, count=count * num_columns,
+                             offset=segments[0][0]).reshape(count, num_columns)
+    else:
+        parts = [np.fromfile(path, dtype=np.float32, count=frames * num_columns, offset=offset).reshape(frames, num_columns)
+                 for offset, frames in segments]
+        loaded = parts[0] if len(parts) == 1 else np.concatenate(parts)
+
+    if sensors is not None:
+        idx = [columns.index(s) if isinstance(s, str) else s - 1 for s in sensors]
+        loaded = loaded[:, idx]
 
-def SyncedDataLoader(path, id, num_sensors):
-    loaded = np.fromfile(path, dtype=[*[("{}-x{}".format(id, str(i)), "f4")
-                                        for i in range(1, num_sensors + 1)], ])
-    return np.array([list(row) for row in loaded])
+    return loaded
@@ -1,4 +1,32 @@
-from .DataSyncer import DataSyncerTX, DataSyncerRX, Data
-from .SyncedDataLoader import SyncedDataLoader
+# The classes are imported from their modules on first access, so that importing the package (e.g. for the bela-data-syncer command line tool) does not import numpy until it is needed
 
-__all__ = ["DataSyncerTX", "DataSyncerRX", "Data", "SyncedDataLoader"]
+import importlib
+
+_modules = {
+    "DataSyncerTX": "DataSyncer",
+    "DataSyncerRX": "DataSyncer",
+    "Data": "DataSyncer",
+    "SyncedDataLoader": "SyncedDataLoader",
+    "SyncedDataHeader": "SyncedDataLoader",
+    "SessionSyncer": "SessionSyncer",
+    "SessionLoader": "SessionLoader",
+    "SyncPlanCache": "SyncPlanCache",
+    "LiveSyncer": "LiveSyncer",
+    "SyncReport": "SyncReport",
+    "Catalog": "Catalog",
+    "ClockGraph": "ClockGraph",
+}
+
+__all__ = ["DataSyncerTX", "DataSyncerRX", "Data", "SyncedDataLoader", "SyncedDataHeader", "SessionSyncer", "SessionLoader", "SyncPlanCache", "LiveSyncer", "SyncReport", "Catalog", "ClockGraph"]
+
+
+def __getattr__(name):
+    if name not in _modules:
+        raise AttributeError("module {!r} has no attribute {!r}".format(__name__, name))
+    value = getattr(importlib.import_module("." + _modules[name], __name__), name)
+    globals()[name] = value  # later accesses do not go through __getattr__
+    return value
+
+
+def __dir__():
+    return sorted([*globals(), *__all__])
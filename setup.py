@@ -36,4 +36,7 @@ setup(
     author_email='teresapelinski@gmail.com',
     packages=['DataSyncer'],
     install_requires=packages,  #external packages acting as dependencies
+    entry_points={
+        'console_scripts': ['bela-data-syncer=DataSyncer.SyncSessions:main'],
+    },
 )
\ No newline at end of file
@@ -0,0 +1,72 @@
+# benchmark loading, syncing and saving synthetic logs (wall time and peak memory of each step)
+
+import argparse
+import os
+import tempfile
+import time
+import tracemalloc
+
+from DataSyncer import DataSyncerTX, DataSyncerRX, SyncedDataLoader
+
+from synthetic_logs import generateLogs
+
+
+def measure(results, name, fn):
+    # Run fn and store its wall time and peak memory (numpy allocations included) under name
+    tracemalloc.start()
+    t = time.perf_counter()
+    out = fn()
+    elapsed = time.perf_counter() - t
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    results.append((name, elapsed, peak))
+    return out
+
+
+def runBenchmark(duration=60, num_sensors=4, num_rx=2, drift=20e-6, dropout=0.01, mmap=False, log_dir=None):
+    results = []
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        log_dir = log_dir or tmp_dir
+        ids = generateLogs(log_dir, duration=duration, num_sensors=num_sensors, num_rx=num_rx, drift=drift, dropout=dropout)
+
+        def path(id, log):
+            return os.path.join(log_dir, "{}-{}.log".format(id, log))
+
+        # Data objects are lazy, so each step is forced with load() to time loading (and offsetting) and syncing separately from saving
+        dataSyncerTX = measure(results, "DataSyncerTX", lambda: DataSyncerTX(
+            "TX0", path("TX0", "sync"), path("TX0", "data"), num_sensors, verbose=False, mmap=mmap).load())
+
+        for id in ids[1:]:
+            dataSyncerRX = measure(results, "DataSyncerRX {}".format(id), lambda: DataSyncerRX(
+                id, path(id, "sync"), path(id, "data"), num_sensors, verbose=False, mmap=mmap).load())
+
+            def sync():
+                dataSyncerRX.syncSensorData(dataSyncerTX)
+                return dataSyncerRX.load()  # the sync is deferred until the sensor data is accessed
+
+            measure(results, "syncSensorData {}".format(id), sync)
+
+            synced_path = os.path.join(tmp_dir, "{}-synced.bin".format(id))
+            measure(results, "saveSyncedData {}".format(id), lambda: dataSyncerRX.saveSyncedData(synced_path))
+            measure(results, "SyncedDataLoader {}".format(id), lambda: SyncedDataLoader(synced_path))
+
+    return results
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Benchmark the DataSyncer classes on synthetic logs")
+    parser.add_argument("--duration", type=float, default=60, help="duration in seconds")
+    parser.add_argument("--num-sensors", type=int, default=4)
+    parser.add_argument("--num-rx", type=int, default=2)
+    parser.add_argument("--drift", type=float, default=20e-6, help="maximum RX clock drift (20e-6 is 20 ppm)")
+    parser.add_argument("--dropout", type=float, default=0.01, help="probability of missing a clock signal")
+    parser.add_argument("--mmap", action="store_true", help="memory-map the log files")
+    args = parser.parse_args()
+
+    results = runBenchmark(duration=args.duration, num_sensors=args.num_sensors, num_rx=args.num_rx, drift=args.drift,
+                           dropout=args.dropout, mmap=args.mmap)
+
+    print("{:<28}{:>12}{:>16}".format("step", "time (s)", "peak (MB)"))
+    for name, elapsed, peak in results:
+        print("{:<28}{:>12.3f}{:>16.1f}".format(name, elapsed, peak / 2**20))
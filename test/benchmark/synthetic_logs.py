@@ -0,0 +1,63 @@
+# generate synthetic TX/RX sync and sensor logs to benchmark the DataSyncer classes at realistic scale
+
+import argparse
+import os
+
+import numpy as np
+
+
+def generateLogs(log_dir, duration=60, sample_rate=22050, num_sensors=4, num_rx=2, d_clock=689 * 8 + 8,
+                 drift=20e-6, jitter=1, dropout=0.01, seed=0):
+    # Write TX0-sync.log, TX0-data.log and RXn-sync.log, RXn-data.log (n = 1..num_rx) to log_dir.
+    # duration is in seconds, drift is the clock drift of each RX relative to the TX (e.g. 20e-6 is 20 ppm), jitter is the maximum error in frames with which a clock signal is received and dropout is the probability that an RX misses a clock signal
+    rng = np.random.default_rng(seed)
+    os.makedirs(log_dir, exist_ok=True)
+
+    num_frames = int(duration * sample_rate)
+    num_clocks = num_frames // d_clock - 1
+
+    ids = ["TX0", *["RX{}".format(i) for i in range(1, num_rx + 1)]]
+    for n, id in enumerate(ids):
+        offset = int(rng.integers(d_clock // 4, d_clock // 2))  # frames elapsed before the first clock signal
+
+        if id == "TX0":
+            sync_frames = offset + np.arange(num_clocks) * d_clock
+            received = np.ones(num_clocks, dtype=bool)
+        else:
+            rx_drift = drift * rng.uniform(-1, 1)
+            sync_frames = offset + np.round(np.arange(num_clocks) * d_clock * (1 + rx_drift)).astype(np.int64)
+            sync_frames += rng.integers(-jitter, jitter + 1, num_clocks)
+            received = rng.random(num_clocks) >= dropout
+            received[[0, -1]] = True
+
+        sync_data = np.stack([sync_frames, np.arange(num_clocks) % 2], axis=1)[received].astype(np.float32)
+        sync_data.tofile(os.path.join(log_dir, "{}-sync.log".format(id)))
+
+        # sensor log, written in chunks so that long recordings do not need to fit in memory
+        num_sensor_frames = int(sync_frames[-1]) + d_clock
+        chunk_frames = 1 << 20
+        with open(os.path.join(log_dir, "{}-data.log".format(id)), 'w+b') as f:
+            for start in range(0, num_sensor_frames, chunk_frames):
+                frames = np.arange(start, min(start + chunk_frames, num_sensor_frames))
+                sensor_data = np.empty((len(frames), num_sensors + 1), dtype=np.float32)
+                sensor_data[:, 0] = frames
+                sensor_data[:, 1:] = np.sin(2 * np.pi * frames[:, None] * (n + np.arange(1, num_sensors + 1)) / sample_rate)
+                sensor_data.tofile(f)
+
+    return ids
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Generate synthetic TX/RX sync and sensor logs")
+    parser.add_argument("log_dir")
+    parser.add_argument("--duration", type=float, default=60, help="duration in seconds")
+    parser.add_argument("--sample-rate", type=int, default=22050)
+    parser.add_argument("--num-sensors", type=int, default=4)
+    parser.add_argument("--num-rx", type=int, default=2)
+    parser.add_argument("--drift", type=float, default=20e-6, help="maximum RX clock drift (20e-6 is 20 ppm)")
+    parser.add_argument("--dropout", type=float, default=0.01, help="probability of missing a clock signal")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    generateLogs(args.log_dir, duration=args.duration, sample_rate=args.sample_rate, num_sensors=args.num_sensors,
+                 num_rx=args.num_rx, drift=args.drift, dropout=args.dropout, seed=args.seed)
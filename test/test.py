@@ -1,10 +1,27 @@
 # DataSyncer testing
 
 import unittest
+import contextlib
 import os
+import tempfile
+import subprocess
+import sys
 import numpy as np
 
-from DataSyncer import DataSyncerTX, DataSyncerRX, Data, SyncedDataLoader
+from DataSyncer import DataSyncerTX, DataSyncerRX, Data, SyncedDataLoader, SyncedDataHeader, SessionSyncer, SessionLoader, SyncPlanCache, LiveSyncer, Catalog, ClockGraph
+from DataSyncer.SyncEngine import unwrapFrames, blockCorrections, syncIndexMap, syncPositions, windowIndexMap, resample, driftPositions
+from DataSyncer.Plotting import minMaxIndices
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "benchmark"))
+from synthetic_logs import generateLogs
+
+
+def syntheticLogs(test_case):
+    # Generate TX0, RX1 and RX2 sync and sensor logs (with clock drift and jitter, so that frames are dropped and inserted) in a temporary directory removed after the test, and return the path of each log by id and log ("sync" or "data"). Only the sync logs of the test/test-data recordings are in the repository
+    log_dir = tempfile.TemporaryDirectory()
+    test_case.addCleanup(log_dir.cleanup)
+    generateLogs(log_dir.name, duration=6, num_sensors=4, num_rx=2, drift=1e-3, jitter=2, dropout=0, seed=1)
+    return lambda id, log: os.path.join(log_dir.name, "{}-{}.log".format(id, log))
 
 
 class test_TX(unittest.TestCase):
@@ -35,6 +52,22 @@ class test_TX(unittest.TestCase):
         )
 
 
+    def test_LazyLoading(self):
+
+        # the sensor log is not read until the sensor data is accessed
+        dataSyncerTX = DataSyncerTX(
+            id="TX0",
+            sync_log_path="test/test-data/TX0-sync.log",
+            sensor_log_path="test/test-data/missing-data.log",
+            num_sensors=4,
+            d_clock=689 * 8 + 8,
+        )
+
+        self.assertEqual(len(dataSyncerTX.sync_df_raw), 51, "Sync data should be loaded on access.")
+
+        with self.assertRaises(FileNotFoundError):
+            dataSyncerTX.sensor_np
+
 class test_RX(unittest.TestCase):
 
     def test_RxLengthInSamples(self):
@@ -82,6 +115,232 @@ class test_RX(unittest.TestCase):
             "RX2 sensor data length is not a multiple of d_clock.")
 
 
+    def test_RxStream(self):
+
+        path = syntheticLogs(self)
+
+        # load sync and sensor data from Bela master (TX)
+        dataSyncerTX = DataSyncerTX(
+            id="TX0",
+            sync_log_path=path("TX0", "sync"),
+            sensor_log_path=path("TX0", "data"),
+            num_sensors=4,
+            d_clock=689 * 8 + 8,
+        )
+
+        dataSyncerRX2 = DataSyncerRX(
+            id="RX2",
+            sync_log_path=path("RX2", "sync"),
+            sensor_log_path=path("RX2", "data"),
+            num_sensors=4,
+            mmap=True)
+
+        # sync block by block and in one batch
+        blocks = list(dataSyncerRX2.syncSensorDataStream(dataSyncerTX))
+        dataSyncerRX2.syncSensorData(dataSyncerTX)
+
+        self.assertEqual(
+            all(len(block) == dataSyncerTX.d_clock for block in blocks), True,
+            "Streamed blocks are not d_clock frames long.")
+
+        self.assertEqual(
+            np.array_equal(np.concatenate(blocks), dataSyncerRX2.sensor_np), True,
+            "Streamed sensor data is not equal to synced sensor data.")
+
+    def test_RxResync(self):
+
+        path = syntheticLogs(self)
+
+        dataSyncerTX = DataSyncerTX(id="TX0", sync_log_path=path("TX0", "sync"), sensor_log_path=path("TX0", "data"),
+                                    num_sensors=4, verbose=False)
+        dataSyncerRX2 = DataSyncerRX(id="RX2", sync_log_path=path("RX2", "sync"), sensor_log_path=path("RX2", "data"),
+                                     num_sensors=4, verbose=False)
+
+        # sync, access the synced data and sync again with another interpolation
+        dataSyncerRX2.syncSensorData(dataSyncerTX)
+        dataSyncerRX2.load()
+        dataSyncerRX2.syncSensorData(dataSyncerTX, interpolation="cubic")
+
+        expected = DataSyncerRX(id="RX2", sync_log_path=path("RX2", "sync"), sensor_log_path=path("RX2", "data"),
+                                num_sensors=4, verbose=False)
+        expected.syncSensorData(dataSyncerTX, interpolation="cubic")
+
+        self.assertEqual(dataSyncerRX2.sensor_columns, ["RX2-x{}".format(i) for i in range(1, 5)], "Syncing again dropped a sensor column.")
+        self.assertEqual(np.array_equal(dataSyncerRX2.sensor_np, expected.sensor_np), True,
+                         "Sensor data synced again is not equal to sensor data synced once.")
+
+    def test_RxSyncReport(self):
+
+        path = syntheticLogs(self)
+
+        # load sync and sensor data from Bela master (TX)
+        dataSyncerTX = DataSyncerTX(
+            id="TX0",
+            sync_log_path=path("TX0", "sync"),
+            sensor_log_path=path("TX0", "data"),
+            num_sensors=4,
+            d_clock=689 * 8 + 8,
+        )
+
+        dataSyncerRX2 = DataSyncerRX(
+            id="RX2",
+            sync_log_path=path("RX2", "sync"),
+            sensor_log_path=path("RX2", "data"),
+            num_sensors=4)
+
+        profiled = []
+        dataSyncerRX2.report.profiler = lambda phase: profiled.append(phase) or contextlib.nullcontext()
+
+        dataSyncerRX2.syncSensorData(dataSyncerTX)
+        dataSyncerRX2.load()
+
+        report = dataSyncerRX2.report.summary()
+        diff = np.diff(dataSyncerRX2.sync_frames) - dataSyncerTX.d_clock
+
+        self.assertEqual(report["num_blocks"], len(dataSyncerRX2.sync_frames) - 1, "Report should count every block.")
+        self.assertEqual(report["dropped_frames"], diff[diff > 0].sum(), "Report should count dropped frames.")
+        self.assertEqual(report["interpolated_frames"], -diff[diff < 0].sum(), "Report should count interpolated frames.")
+        self.assertEqual(set(report["timings"]), {"load", "offset", "sync"}, "Report should time every phase.")
+        self.assertEqual(set(profiled), {"load", "offset", "sync"}, "Profiler should wrap every phase.")
+
+        # with a drift model the data is resampled, no frames are dropped or interpolated
+        import io
+        dataSyncerRX2 = DataSyncerRX(id="RX2", sync_log_path=path("RX2", "sync"), sensor_log_path=path("RX2", "data"), num_sensors=4)
+        dataSyncerRX2.syncSensorData(dataSyncerTX, drift_model="robust")
+        with contextlib.redirect_stdout(io.StringIO()) as output:
+            dataSyncerRX2.load()
+
+        drift_report = dataSyncerRX2.report.summary()
+        self.assertEqual("samples" in output.getvalue(), False, "Drift model sync should not report dropped or added samples.")
+        self.assertEqual((drift_report["dropped_frames"], drift_report["interpolated_frames"], drift_report["drift_model"]), (0, 0, "robust"),
+                         "Drift model sync should not count dropped or interpolated frames.")
+        self.assertEqual(drift_report["drift"], report["drift"], "Drift model sync should report the clock drift.")
+
+    def test_RxWindow(self):
+
+        path = syntheticLogs(self)
+
+        # load sync and sensor data from Bela master (TX)
+        dataSyncerTX = DataSyncerTX(
+            id="TX0",
+            sync_log_path=path("TX0", "sync"),
+            sensor_log_path=path("TX0", "data"),
+            num_sensors=4,
+            d_clock=689 * 8 + 8,
+            sample_rate=22050,
+        )
+
+        dataSyncerRX2 = DataSyncerRX(
+            id="RX2",
+            sync_log_path=path("RX2", "sync"),
+            sensor_log_path=path("RX2", "data"),
+            num_sensors=4)
+
+        # a window across several blocks, in seconds
+        window = dataSyncerTX.syncedWindow([dataSyncerRX2], 2, 4, seconds=True)
+
+        dataSyncerRX2.syncSensorData(dataSyncerTX)
+
+        self.assertEqual(np.array_equal(window["RX2"], dataSyncerRX2.sensor_np[2 * 22050:4 * 22050]), True,
+                         "RX2 window is not equal to synced sensor data.")
+        self.assertEqual(np.array_equal(window["TX0"], dataSyncerTX.sensor_np[2 * 22050:4 * 22050]), True,
+                         "TX window is not equal to sensor data.")
+
+        # same with a clock-drift model
+        dataSyncerRX2 = DataSyncerRX(
+            id="RX2",
+            sync_log_path=path("RX2", "sync"),
+            sensor_log_path=path("RX2", "data"),
+            num_sensors=4)
+
+        drift_window = dataSyncerRX2.syncSensorDataWindow(dataSyncerTX, 30000, 50000, drift_model="robust")
+        dataSyncerRX2.syncSensorData(dataSyncerTX, drift_model="robust")
+
+        self.assertEqual(np.array_equal(drift_window, dataSyncerRX2.sensor_np[30000:50000]), True,
+                         "RX2 drift model window is not equal to synced sensor data.")
+
+class test_Session(unittest.TestCase):
+
+    def test_SessionSync(self):
+
+        path = syntheticLogs(self)
+
+        # load sync and sensor data from Bela master (TX)
+        dataSyncerTX = DataSyncerTX(
+            id="TX0",
+            sync_log_path=path("TX0", "sync"),
+            sensor_log_path=path("TX0", "data"),
+            num_sensors=4,
+            d_clock=689 * 8 + 8,
+        )
+
+        RX_specs = [{"id": id, "sync_log_path": path(id, "sync"),
+                     "sensor_log_path": path(id, "data"), "num_sensors": 4}
+                    for id in ["RX1", "RX2"]]
+
+        # sync the receivers in parallel
+        sessionSyncer = SessionSyncer(dataSyncerTX, RX_specs, num_workers=2)
+        synced = sessionSyncer.sync()
+
+        # sync the receivers one at a time
+        for spec in RX_specs:
+            dataSyncerRX = DataSyncerRX(**spec)
+            dataSyncerRX.syncSensorData(dataSyncerTX)
+
+            self.assertEqual(
+                np.array_equal(synced[spec["id"]], dataSyncerRX.sensor_np), True,
+                "{} sensor data synced in parallel is not equal to synced sensor data.".format(spec["id"]))
+
+        self.assertEqual(
+            sessionSyncer.combined.shape == (len(dataSyncerTX.sensor_df), 3 * 4), True,
+            "Combined sensor data does not contain all devices.")
+
+        # the receivers are synced on first access
+        lazySyncer = SessionSyncer(dataSyncerTX, RX_specs, num_workers=2, verbose=False)
+        self.assertEqual(np.array_equal(lazySyncer.combined, sessionSyncer.combined) and lazySyncer.columns == sessionSyncer.columns, True,
+                         "Combined sensor data is not synced on first access.")
+
+    def test_SessionLoader(self):
+
+        path = syntheticLogs(self)
+
+        def session():
+            dataSyncerTX = DataSyncerTX(id="TX0", sync_log_path=path("TX0", "sync"),
+                                        sensor_log_path=path("TX0", "data"), num_sensors=4)
+            RX_Syncers = [DataSyncerRX(id=id, sync_log_path=path(id, "sync"),
+                                       sensor_log_path=path(id, "data"), num_sensors=4)
+                          for id in ["RX1", "RX2"]]
+            return dataSyncerTX, RX_Syncers
+
+        # read all logs concurrently and sync the receivers as they are read
+        dataSyncerTX, RX_Syncers = session()
+        sessionLoader = SessionLoader(dataSyncerTX, RX_Syncers, max_io=2, num_workers=2, verbose=False)
+        completed = [RX_Syncer.id for RX_Syncer in sessionLoader.loadAsCompleted()]
+
+        self.assertEqual(sorted(completed), ["RX1", "RX2"], "Not all receivers were synced.")
+
+        # read and sync one at a time
+        serialTX, serial_RX_Syncers = session()
+        self.assertEqual(np.array_equal(dataSyncerTX.sensor_np, serialTX.sensor_np), True,
+                         "Prefetched TX sensor data is not equal to loaded sensor data.")
+        for RX_Syncer, serialRX in zip(RX_Syncers, serial_RX_Syncers):
+            serialRX.syncSensorData(serialTX)
+            self.assertEqual(np.array_equal(RX_Syncer.sensor_np, serialRX.sensor_np), True,
+                             "{} sensor data synced while prefetching is not equal to synced sensor data.".format(RX_Syncer.id))
+
+        # prefetched reads are timed (and profiled) in the thread that takes their data, not in the I/O threads
+        import threading
+        from concurrent.futures import ThreadPoolExecutor
+        threads = []
+        prefetchedTX, _ = session()
+        prefetchedTX.report.profiler = lambda phase: threads.append(threading.get_ident()) or contextlib.nullcontext()
+        with ThreadPoolExecutor(max_workers=2) as io:
+            prefetchedTX.prefetch(io).load()
+
+        self.assertEqual("load" in prefetchedTX.report.timings and set(threads) == {threading.get_ident()}, True,
+                         "Prefetched reads are not timed in the loading thread.")
+
+
 class test_DataLoader(unittest.TestCase):
 
     def test_DataLoaderShapes(self):
@@ -116,6 +375,73 @@ class test_DataLoader(unittest.TestCase):
         )
 
 
+class test_DataLoaderWindow(unittest.TestCase):
+
+    def test_DataLoaderWindow(self):
+
+        id = "RX0"
+        num_sensors = 2
+
+        data = Data(id=id, sensor_log_path="test/test-data/mono/{}-data.log".format(id),
+                    num_sensors=num_sensors, verbose=False)
+
+        # temporary file to store the generated sensor data type
+        test_fn = "test/data-window.tmp"
+
+        data.saveSyncedData(test_fn)
+
+        # load a window of frames of the second sensor, reading and memory-mapping the file
+        window = SyncedDataLoader(id=id, path=test_fn, num_sensors=num_sensors, sensors=["RX0-x2"], start=1000, stop=2000)
+        window_mmap = SyncedDataLoader(id=id, path=test_fn, num_sensors=num_sensors, sensors=[2], start=1000, stop=2000,
+                                       mmap=True)
+
+        self.assertEqual(np.array_equal(window, data.sensor_np[1000:2000, [1]]), True,
+                         "Loaded window should be equal to saved data.")
+        self.assertEqual(np.array_equal(window_mmap, window), True,
+                         "Memory-mapped window should be equal to loaded window.")
+
+        del window_mmap
+        os.remove(test_fn)
+
+
+    def test_ChunkedFormat(self):
+
+        id = "RX0"
+        num_sensors = 2
+
+        data = Data(id=id, sensor_log_path="test/test-data/mono/{}-data.log".format(id),
+                    num_sensors=num_sensors, sample_rate=22050, verbose=False)
+
+        # temporary files to store the generated sensor data type
+        test_fn = "test/data-chunked.tmp"
+        raw_fn = "test/data-raw.tmp"
+
+        data.saveSyncedData(test_fn, chunk_frames=1000)
+        data.saveSyncedData(raw_fn, raw=True)
+
+        header = SyncedDataHeader(test_fn)
+
+        self.assertEqual(header["columns"], data.sensor_columns, "Header columns should be equal to saved columns.")
+        self.assertEqual(header["sample_rate"], 22050, "Header sample rate should be equal to saved sample rate.")
+        self.assertEqual(header["num_frames"], len(data.sensor_np), "Header length should be equal to saved length.")
+
+        # a window across several chunks, without id and num_sensors
+        window = SyncedDataLoader(path=test_fn, start=1500, stop=4200)
+        window_mmap = SyncedDataLoader(path=test_fn, start=1500, stop=4200, mmap=True)
+        window_raw = SyncedDataLoader(id=id, path=raw_fn, num_sensors=num_sensors, start=1500, stop=4200)
+
+        self.assertEqual(np.array_equal(window, data.sensor_np[1500:4200]), True,
+                         "Loaded window should be equal to saved data.")
+        self.assertEqual(np.array_equal(window_mmap, window), True,
+                         "Memory-mapped window should be equal to loaded window.")
+        self.assertEqual(np.array_equal(window_raw, window), True,
+                         "Headerless window should be equal to loaded window.")
+
+        del window_mmap
+        os.remove(test_fn)
+        os.remove(raw_fn)
+
+
 class test_MonoData(unittest.TestCase):
 
     def test_DataLoaderShapes(self):
@@ -147,6 +473,452 @@ class test_MonoData(unittest.TestCase):
             "Saved data should be equal to loaded data.",
         )
 
+    def test_MmapLoading(self):
+
+        id = "RX0"
+        num_sensors = 2
+
+        data = Data(id=id, sensor_log_path="test/test-data/mono/{}-data.log".format(id),
+                    num_sensors=num_sensors, verbose=False)
+        data_mmap = Data(id=id, sensor_log_path="test/test-data/mono/{}-data.log".format(id),
+                         num_sensors=num_sensors, verbose=False, mmap=True)
+
+        # in mmap mode the sensor data is a view of the log file
+        self.assertIsInstance(data_mmap.sensor_np.base, np.memmap, "Sensor data is not a view of the log file.")
+
+        self.assertEqual(np.array_equal(data.sensor_np, data_mmap.sensor_np), True,
+                         "Memory-mapped data should be equal to loaded data.")
+        self.assertEqual(data.sensor_df.equals(data_mmap.sensor_df), True,
+                         "Memory-mapped dataframe should be equal to loaded dataframe.")
+
+
+    def test_NoPandasImport(self):
+
+        # loading, syncing and saving do not need pandas or matplotlib
+        script = """
+import sys
+from DataSyncer import Data
+data = Data(id="RX0", sensor_log_path="test/test-data/mono/RX0-data.log", num_sensors=2, verbose=False)
+data.sensor_np
+print("pandas" in sys.modules or "matplotlib" in sys.modules)
+"""
+        output = subprocess.run([sys.executable, "-c", script], capture_output=True, text=True,
+                                env={**os.environ, "PYTHONPATH": os.getcwd()}).stdout.strip()
+
+        self.assertEqual(output, "False", "pandas or matplotlib were imported.")
+
+
+class test_SyncEngine(unittest.TestCase):
+
+    def test_SyncIndexMap(self):
+
+        d_clock = 689 * 8 + 8
+
+        # tweaked sync data with missing and extra frames
+        sync_frames = np.fromfile("test/test-data/RX2-sync-int.log",
+                                  dtype=[("framesElapsed", "f4"), ("msg", "f4")])["framesElapsed"]
+
+        corrections = blockCorrections(sync_frames, d_clock)
+        index_map = syncIndexMap(sync_frames, corrections)
+
+        # synced data spans a constant number of frames (d_clock) between clock signals
+        self.assertEqual(len(index_map), (len(sync_frames) - 1) * d_clock,
+                         "Synced data length is not a multiple of d_clock.")
+
+        # extra frames are dropped and missing frames repeat the following frame
+        self.assertEqual(np.count_nonzero(np.diff(index_map) == 0), -corrections[corrections < 0].sum(),
+                         "Missing frames were not inserted.")
+        self.assertEqual(np.diff(index_map).sum() - np.count_nonzero(np.diff(index_map)),
+                         corrections[corrections > 0].sum(), "Extra frames were not dropped.")
+
+    def test_LastBlockExtraFrames(self):
+
+        # extra frames in the last block are dropped from within it
+        sync_frames = [0, 10, 20, 32]
+        index_map = syncIndexMap(sync_frames, blockCorrections(sync_frames, 10))
+
+        self.assertEqual(len(index_map), 30, "Synced data length is not a multiple of d_clock.")
+
+    def test_MissedClockSignal(self):
+
+        # a missed clock signal spans two d_clock blocks and needs no dropping
+        corrections = blockCorrections([0, 10, 30, 39], 10)
+
+        self.assertEqual(list(corrections), [0, 0, -1], "Missed clock signal was not unwrapped.")
+
+
+    def test_WindowIndexMap(self):
+
+        # clock signals with extra, missing and missed clock signals, also in the last block
+        sync_frames = np.array([5, 15, 26, 34, 45, 75, 84, 96])
+        corrections = blockCorrections(sync_frames, 10)
+        index_map = syncIndexMap(sync_frames, corrections)
+
+        self.assertEqual(len(index_map) % 10, 0, "Synced data length is not a multiple of d_clock.")
+
+        for start in range(0, len(index_map), 3):
+            for stop in range(start, len(index_map) + 5, 7):
+                self.assertEqual(np.array_equal(windowIndexMap(sync_frames, corrections, start, stop), index_map[start:stop]), True,
+                                 "Window [{}, {}) is not equal to the synced data.".format(start, stop))
+
+    def test_GapInterpolation(self):
+
+        # missing frames (two in the second block) in a slowly varying signal sampled at every frame
+        sync_frames = np.array([0, 10, 18, 28])
+        frames = np.arange(28)
+        sensor = np.stack([2 * frames + 1, np.sin(frames / 5)], axis=1).astype(np.float32)
+
+        positions = syncPositions(syncIndexMap(sync_frames, blockCorrections(sync_frames, 10)))
+        missing = positions != np.round(positions)
+
+        # inserted after the frame at which the clock signal ending the block was received
+        self.assertEqual(np.allclose(positions[missing], [18 + 1 / 3, 18 + 2 / 3]), True, "Missing frames are not evenly spaced.")
+
+        # hold repeats the following frame, the other modes reconstruct the signal at the missing positions
+        self.assertEqual(np.array_equal(resample(sensor, positions, "hold"), sensor[np.ceil(positions).astype(int)]), True,
+                         "Missing frames do not hold the following frame.")
+        for interpolation, tolerance in [("linear", 1e-2), ("cubic", 1e-3), ("sinc", 1e-3)]:
+            synced = resample(sensor, positions, interpolation)
+            self.assertEqual(np.array_equal(synced[~missing], sensor[positions[~missing].astype(int)]), True,
+                             "Kept frames were modified.")
+            expected = np.stack([2 * positions + 1, np.sin(positions / 5)], axis=1)
+            self.assertEqual(np.allclose(synced[missing, 0], expected[missing, 0], atol=1e-4), True,
+                             "{} interpolation does not preserve a ramp.".format(interpolation))
+            self.assertEqual(np.allclose(synced[missing, 1], expected[missing, 1], atol=tolerance), True,
+                             "{} interpolation does not reconstruct the signal.".format(interpolation))
+
+        with self.assertRaises(ValueError):
+            resample(sensor, positions, "nearest")
+
+    def test_UnwrapFrames(self):
+
+        d_clock = 689 * 8 + 8
+
+        # clock signals received about 3.8 hours into a recording (past 2^24 frames), with a missed clock signal
+        sync_frames = 3 * 10 ** 8 + np.arange(1000) * d_clock
+        sync_frames = np.delete(sync_frames, 500)
+        framesElapsed = sync_frames.astype(np.float32)
+
+        # float32 rounding shows up as extra and missing frames, the unwrapped frame counters are exact
+        self.assertEqual(np.count_nonzero(blockCorrections(framesElapsed.astype(np.int64), d_clock)) > 0, True,
+                         "float32 framesElapsed should not be exact past 2^24 frames.")
+        self.assertEqual(np.array_equal(unwrapFrames(framesElapsed), sync_frames), True, "Frame counters were not unwrapped.")
+
+        # a growing log unwrapped again as it grows keeps the counters of the clock signals read before
+        self.assertEqual(np.array_equal(unwrapFrames(framesElapsed[:600]), unwrapFrames(framesElapsed)[:600]), True,
+                         "Frame counters depend on the clock signals after them.")
+
+        # RX clocks drifting by 20 and 50 ppm over 40000 blocks (past 2^27 frames): the drift does not build up into the counters
+        for drift in [20e-6, -50e-6]:
+            drifting_frames = 1000 + np.round(np.arange(40000) * d_clock * (1 + drift)).astype(np.int64)
+            unwrapped = unwrapFrames(drifting_frames.astype(np.float32))
+            self.assertEqual(np.abs(unwrapped - drifting_frames).max() <= 1, True, "Clock drift builds up into the frame counters.")
+            self.assertEqual(np.abs(blockCorrections(unwrapped, d_clock)).max() <= 1, True,
+                             "Clock drift shows up as bursts of extra or missing frames.")
+
+        # the raw sync dataframe holds the unwrapped frame counters
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            sync_log_path = os.path.join(tmp_dir, "RX1-sync.log")
+            np.stack([framesElapsed, np.zeros_like(framesElapsed)], axis=1).tofile(sync_log_path)
+            data = Data("RX1", 4, os.path.join(tmp_dir, "RX1-data.log"), sync_log_path, verbose=False)
+            self.assertEqual(np.array_equal(data.sync_df_raw["framesElapsed"], sync_frames), True,
+                             "Raw sync dataframe does not hold the unwrapped frame counters.")
+
+    def test_DriftModel(self):
+
+        # RX clock 1% faster than the TX, with a late clock signal
+        sync_frames = np.array([0, 101, 202, 310, 404, 505])
+        corrections = blockCorrections(sync_frames, 100)
+
+        piecewise = driftPositions(sync_frames, corrections, 100, "piecewise")
+        robust = driftPositions(sync_frames, corrections, 100, "robust")
+
+        self.assertEqual(len(piecewise), len(syncIndexMap(sync_frames, corrections)), "Synced data length depends on the drift model.")
+        self.assertEqual(np.array_equal(piecewise[::100], sync_frames[:-1]), True, "Clock signals are not mapped onto the TX frames.")
+        self.assertEqual(np.all(np.diff(piecewise) > 0), True, "Frames are dropped or repeated.")
+        self.assertEqual(np.allclose(robust, 1.01 * np.arange(500), atol=0.5), True, "Drift fit is biased by the late clock signal.")
+
+        # RX clock slower than the TX, with frames missing in the last block
+        sync_frames = np.array([50, 150, 250, 349])
+        corrections = blockCorrections(sync_frames, 100)
+        sensor = np.random.rand(299, 2).astype(np.float32)
+
+        for model in ["piecewise", "robust"]:
+            positions = driftPositions(sync_frames, corrections, 100, model)
+            self.assertEqual((len(positions), positions.max() <= 298), (300, True), "Positions are past the last frame.")
+            self.assertEqual(len(resample(sensor, positions, "sinc")), 300, "Synced data length is not a multiple of d_clock.")
+
+
+class test_SyncPlanCache(unittest.TestCase):
+
+    def test_CacheKeyAndEviction(self):
+
+        with tempfile.TemporaryDirectory() as cache_dir:
+            cache = SyncPlanCache(cache_dir, max_size=1024)
+
+            key = cache.key("test/test-data/RX2-sync-int.log", "test/test-data/TX0-sync.log", 689 * 8 + 8)
+
+            # the key depends on the content of the sync logs and d_clock
+            self.assertNotEqual(key, cache.key("test/test-data/RX2-sync.log", "test/test-data/TX0-sync.log", 689 * 8 + 8),
+                                "Different sync logs should have different keys.")
+            self.assertNotEqual(key, cache.key("test/test-data/RX2-sync-int.log", "test/test-data/TX0-sync.log", 689 * 8),
+                                "Different d_clock should have different keys.")
+
+            self.assertIsNone(cache.load(key), "Empty cache should not return a plan.")
+
+            plan = np.array([0, -1, 2, 0])
+            cache.save(key, plan)
+            self.assertEqual(np.array_equal(cache.load(key), plan), True, "Cached plan should be equal to saved plan.")
+            self.assertIsNone(cache.load(key, num_blocks=5), "Plan of another number of blocks should not be used.")
+
+            # plans computed by other versions are not used
+            from unittest import mock
+            with mock.patch("DataSyncer.SyncPlanCache.PLAN_VERSION", 1):
+                self.assertNotEqual(key, cache.key("test/test-data/RX2-sync-int.log", "test/test-data/TX0-sync.log", 689 * 8 + 8),
+                                    "Different plan versions should have different keys.")
+
+            # plans larger than max_size are evicted
+            cache.save("large", np.zeros(1024))
+            self.assertIsNone(cache.load("large"), "Cache should not grow larger than max_size.")
+
+
+class test_LiveSyncer(unittest.TestCase):
+
+    def test_LiveSync(self):
+
+        d_clock = 10
+        num_sensors = 2
+
+        # clock signals with extra, missing and missed clock signals, and sensor data with framesElapsed in the first column
+        sync_frames = np.array([5, 15, 26, 34, 45, 75, 84, 94])
+        sync_data = np.stack([sync_frames, np.arange(len(sync_frames)) % 2], axis=1).astype(np.float32)
+        sensor_data = np.concatenate([np.arange(100)[:, None], np.random.rand(100, num_sensors)], axis=1).astype(np.float32)
+
+        # synced data when syncing the whole logs at once
+        expected = resample(sensor_data[sync_frames[0]:sync_frames[-1], 1:],
+                            syncPositions(syncIndexMap(sync_frames, blockCorrections(sync_frames, d_clock))))
+
+        with tempfile.TemporaryDirectory() as log_dir:
+            sync_log_path = os.path.join(log_dir, "RX0-sync.log")
+            sensor_log_path = os.path.join(log_dir, "RX0-data.log")
+            open(sync_log_path, 'wb').close()
+            open(sensor_log_path, 'wb').close()
+
+            liveSyncer = LiveSyncer("RX0", sync_log_path, sensor_log_path, num_sensors, d_clock=d_clock, verbose=False)
+
+            # append to the logs as the logger would, one clock signal at a time
+            for i in range(len(sync_frames)):
+                with open(sync_log_path, 'ab') as f:
+                    f.write(sync_data[i].tobytes())
+                with open(sensor_log_path, 'ab') as f:
+                    f.write(sensor_data[0 if i == 0 else sync_frames[i - 1]:sync_frames[i]].tobytes())
+
+                synced = liveSyncer.update()
+
+                self.assertEqual(len(synced) % d_clock, 0, "Synced frames are not a multiple of d_clock.")
+                self.assertEqual(len(liveSyncer.sensor_np) >= (sync_frames[i] - sync_frames[0]) // d_clock * d_clock - d_clock, True,
+                                 "Synced data lags more than one block behind the logs.")
+
+        self.assertEqual(np.array_equal(liveSyncer.sensor_np, expected), True,
+                         "Live synced data is not equal to synced data.")
+
+
+class test_Plotting(unittest.TestCase):
+
+    def test_MinMaxDecimation(self):
+
+        y = np.sin(np.linspace(0, 100, 100003)) + np.random.rand(100003)
+
+        idx = minMaxIndices(y, 0, len(y), 500)
+
+        # at most two points per bin and the envelope of the signal is kept
+        self.assertEqual(len(idx) <= 2 * 501, True, "Decimated signal has too many points.")
+        self.assertEqual(y[idx].max() == y.max() and y[idx].min() == y.min(), True,
+                         "Decimated signal does not keep the envelope of the signal.")
+
+        # a zoomed range is decimated within the range
+        idx = minMaxIndices(y, 1000, 2000, 500)
+        self.assertEqual(np.array_equal(idx, np.arange(1000, 2000)), True,
+                         "Short ranges should not be decimated.")
+
+
+class test_Catalog(unittest.TestCase):
+
+    def test_CatalogBuild(self):
+
+        with tempfile.TemporaryDirectory() as index_dir:
+            index_path = os.path.join(index_dir, "index.json")
+
+            catalog = Catalog.build("test/test-data", d_clock=689 * 8 + 8, index_path=index_path, verbose=False)
+
+            # same checks as test_TxSyncInterval, from the index only
+            TX, = catalog.query(id="TX0")
+            self.assertEqual(TX["d_clock_consistent"], True, "Clock signals in TX are not sent in d_clock intervals.")
+            self.assertEqual(TX["num_blocks"], 50, "TX block count is not correct.")
+
+            RX2, = catalog.query(id="RX2")
+            self.assertEqual(RX2["missing_frames"], 5, "RX2 missing frames count is not correct.")
+
+            mono, = catalog.query(session="mono")
+            self.assertEqual((mono["num_sensors"], mono["num_frames"]), (2, 249192),
+                             "Sensor log shape was not inferred from the sensor log.")
+
+            self.assertEqual(catalog.covering(0, 50 * (689 * 8 + 8)), ["."], "All devices cover the session.")
+
+            # the index is persisted
+            self.assertEqual(Catalog.load(index_path).entries, catalog.entries, "Loaded index should be equal to built index.")
+
+
+class test_ClockGraph(unittest.TestCase):
+
+    def test_Projection(self):
+
+        path = syntheticLogs(self)
+
+        # load sync and sensor data from Bela master (TX)
+        dataSyncerTX = DataSyncerTX(
+            id="TX0",
+            sync_log_path=path("TX0", "sync"),
+            sensor_log_path=path("TX0", "data"),
+            num_sensors=4,
+            d_clock=689 * 8 + 8,
+        )
+
+        dataSyncerRX2 = DataSyncerRX(
+            id="RX2",
+            sync_log_path=path("RX2", "sync"),
+            sensor_log_path=path("RX2", "data"),
+            num_sensors=4)
+
+        clockGraph = ClockGraph(verbose=False).addDevice(dataSyncerTX).addDevice(dataSyncerRX2).link("RX2", "TX0")
+        projected = clockGraph.project("RX2", "TX0")
+
+        # a direct link is the piecewise drift model
+        dataSyncerRX2.syncSensorData(dataSyncerTX, drift_model="piecewise")
+        self.assertEqual(np.allclose(projected, dataSyncerRX2.sensor_np, atol=1e-6), True,
+                         "RX2 projected onto TX0 is not equal to synced sensor data.")
+
+    def test_BridgedClockDomains(self):
+
+        d_clock = 100
+        period = 2000  # frames of the common signal recorded by every device
+
+        # clock rate and first frame of each device relative to a common time, TXA and TXB are bridged by RXB
+        clocks = {"TXA": (1, 0), "TXB": (1 + 50e-6, 3000), "RXB": (1 - 30e-6, 700), "RXC": (1 + 20e-6, 1500)}
+
+        def frames(id, time):
+            rate, offset = clocks[id]
+            return np.round(np.asarray(time) * rate + offset)
+
+        def sentTimes(TX_id):
+            # clock signals sent every d_clock frames of the TX, from its frame 500
+            rate, offset = clocks[TX_id]
+            return (500 + np.arange(150) * d_clock) / rate
+
+        with tempfile.TemporaryDirectory() as log_dir:
+            def writeLogs(id, sync_logs):
+                rate, offset = clocks[id]
+                device_frames = np.arange(20000)
+                signal = np.sin(2 * np.pi * (device_frames - offset) / rate / period)
+                np.stack([device_frames, signal], axis=1).astype(np.float32).tofile(os.path.join(log_dir, "{}-data.log".format(id)))
+                for name, sync_frames in sync_logs.items():
+                    np.stack([sync_frames, np.arange(len(sync_frames)) % 2], axis=1).astype(np.float32).tofile(
+                        os.path.join(log_dir, "{}-sync{}.log".format(id, name)))
+
+            writeLogs("TXA", {"": frames("TXA", sentTimes("TXA"))})
+            writeLogs("TXB", {"": frames("TXB", sentTimes("TXB"))})
+            writeLogs("RXB", {"": frames("RXB", sentTimes("TXA")), "-TXB": frames("RXB", sentTimes("TXB"))})
+            writeLogs("RXC", {"": frames("RXC", sentTimes("TXB"))})
+
+            def path(id, name=""):
+                return os.path.join(log_dir, "{}-{}.log".format(id, name))
+
+            clockGraph = ClockGraph(verbose=False)
+            for id in ["TXA", "TXB"]:
+                clockGraph.addDevice(DataSyncerTX(id=id, sync_log_path=path(id, "sync"), sensor_log_path=path(id, "data"),
+                                                  num_sensors=1, d_clock=d_clock, verbose=False))
+            for id in ["RXB", "RXC"]:
+                clockGraph.addDevice(DataSyncerRX(id=id, sync_log_path=path(id, "sync"), sensor_log_path=path(id, "data"),
+                                                  num_sensors=1, verbose=False))
+
+            clockGraph.link("RXB", "TXA").link("RXB", "TXB", sync_log_path=path("RXB", "sync-TXB")).link("RXC", "TXB")
+
+            self.assertEqual(clockGraph.path("RXC", "TXA"), ["RXC", "TXB", "RXB", "TXA"], "Clock domains are not bridged.")
+
+            # RXC projected onto the clock of TXA, which it never received clock signals from
+            projected = clockGraph.project("RXC", "TXA")[:, 0]
+            TXA_frames = np.arange(clockGraph.devices["TXA"].sync_frames[0], clockGraph.devices["TXA"].sync_frames[-1])
+            expected = np.sin(2 * np.pi * TXA_frames / period)
+
+            # the devices started at different times, compare the frames recorded by all of them
+            self.assertEqual(np.allclose(projected[3000:-3000], expected[3000:-3000], atol=1e-2), True,
+                             "RXC projected onto TXA is not aligned.")
+
+
+class test_SyncSessions(unittest.TestCase):
+
+    def test_CommandLine(self):
+
+        path = syntheticLogs(self)
+
+        from DataSyncer.SyncSessions import main
+
+        with tempfile.TemporaryDirectory() as root:
+            session = os.path.join(root, "session")
+            os.mkdir(session)
+            for id in ["TX0", "RX1", "RX2"]:
+                for log in ["sync", "data"]:
+                    with open(path(id, log), 'rb') as src, open(os.path.join(session, "{}-{}.log".format(id, log)), 'wb') as dst:
+                        dst.write(src.read())
+
+            output_dir = os.path.join(root, "synced")
+            self.assertEqual(main([session, "-o", output_dir, "-j", "2", "-q"]), 0, "Session was not synced.")
+
+            dataSyncerTX = DataSyncerTX(id="TX0", sync_log_path=path("TX0", "sync"),
+                                        sensor_log_path=path("TX0", "data"), num_sensors=4, verbose=False)
+            self.assertEqual(np.array_equal(SyncedDataLoader(os.path.join(output_dir, "session", "TX0-synced.bin")), dataSyncerTX.sensor_np),
+                             True, "Saved TX data is not equal to its sensor data.")
+            for id in ["RX1", "RX2"]:
+                dataSyncerRX = DataSyncerRX(id=id, sync_log_path=path(id, "sync"),
+                                            sensor_log_path=path(id, "data"), num_sensors=4, verbose=False)
+                dataSyncerRX.syncSensorData(dataSyncerTX)
+                self.assertEqual(np.array_equal(SyncedDataLoader(os.path.join(output_dir, "session", "{}-synced.bin".format(id))), dataSyncerRX.sensor_np),
+                                 True, "Saved {} data is not equal to synced sensor data.".format(id))
+
+            # up to date sessions are skipped
+            mtime = os.path.getmtime(os.path.join(output_dir, "session", "RX1-synced.bin"))
+            main([session, "-o", output_dir, "-q"])
+            self.assertEqual(os.path.getmtime(os.path.join(output_dir, "session", "RX1-synced.bin")), mtime, "Up to date session was synced again.")
+
+            # sessions synced with other settings are not up to date
+            main([session, "-o", output_dir, "-q", "--interpolation", "hold"])
+            self.assertEqual(SyncedDataHeader(os.path.join(output_dir, "session", "RX1-synced.bin"))["sync_settings"]["interpolation"], "hold",
+                             "Session synced with other settings was skipped.")
+
+            # sessions with the same directory name are synced to their path under the output directory
+            for day in ["day1", "day2"]:
+                take = os.path.join(root, "recordings", day, "take1")
+                os.makedirs(take)
+                for log in ["sync", "data"]:
+                    with open(os.path.join(session, "TX0-{}.log".format(log)), 'rb') as src, open(os.path.join(take, "TX0-{}.log".format(log)), 'wb') as dst:
+                        dst.write(src.read())
+
+            self.assertEqual(main([os.path.join(root, "recordings"), "-r", "-o", output_dir, "-q"]), 0, "Sessions were not synced.")
+            self.assertEqual(all(os.path.exists(os.path.join(output_dir, "recordings", day, "take1", "TX0-synced.bin")) for day in ["day1", "day2"]),
+                             True, "Sessions with the same directory name collide.")
+
+        # the command line tool starts without importing numpy
+        script = """
+import sys
+import DataSyncer.SyncSessions
+print("numpy" in sys.modules)
+"""
+        output = subprocess.run([sys.executable, "-c", script], capture_output=True, text=True,
+                                env={**os.environ, "PYTHONPATH": os.getcwd()}).stdout.strip()
+
+        self.assertEqual(output, "False", "numpy was imported.")
+
+
 # TODO test error case in which there are more than half of the block missing values in the sensor data
 
 